@@ -3,14 +3,24 @@ from app.config import config_dict
 from app.extensions import db, migrate, login_manager, csrf
 
 
-def create_app(config_name='development'):
+def create_app(config_name='development', config_overrides=None):
     """
     Application factory function to create and configure the Flask app
+
+    config_overrides, if given, is applied on top of the named config
+    before any extension is initialized.
     """
     app = Flask(__name__)
     
     # Load configuration
     app.config.from_object(config_dict[config_name])
+    app.config.update(config_overrides or {})
+    
+    # Replica binds and the pool class have to be set before db.init_app
+    from app.replicas import init_replicas
+    from app.db_pool import configure_pool, init_pool_telemetry
+    configure_pool(app)
+    init_replicas(app)
     
     # Initialize extensions
     db.init_app(app)
@@ -18,6 +28,15 @@ def create_app(config_name='development'):
     login_manager.init_app(app)
     csrf.init_app(app)
     
+    # WAL and write serialization for SQLite deployments (opt-in); must be
+    # installed before the first connection is opened
+    from app.sqlite_tuning import init_sqlite_tuning
+    init_sqlite_tuning(app)
+    
+    # Raise on lazy loads when strict loading is enabled (testing)
+    from app.strict_loading import init_strict_loading
+    init_strict_loading(app)
+    
     # Configure login manager
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
@@ -30,6 +49,7 @@ def create_app(config_name='development'):
     from app.payments.routes import payments_bp
     from app.history.routes import history_bp
     from app.profile.routes import profile_bp
+    from app.admin.routes import admin_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
@@ -38,6 +58,37 @@ def create_app(config_name='development'):
     app.register_blueprint(payments_bp)
     app.register_blueprint(history_bp)
     app.register_blueprint(profile_bp)
+    app.register_blueprint(admin_bp)
+    csrf.exempt(admin_bp)
+    
+    # Size the auth token and user caches
+    from app.auth import tokens
+    from app.models import user_cache
+    tokens.init_app(app)
+    user_cache.configure(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+    
+    # Coalesce contribution callbacks into batched writes
+    from app.payments.contributions import init_contributions
+    init_contributions(app)
+    
+    # Per-request SQL, template and upstream timings served at /metrics
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
+    # Pool checkout wait, overflow and timeout telemetry, plus startup warm-up
+    init_pool_telemetry(app)
+    
+    # Log and EXPLAIN statements slower than SLOW_QUERY_THRESHOLD_MS
+    from app.slow_queries import init_slow_query_log
+    init_slow_query_log(app)
+    
+    # Stack-sampling profiler (PROFILE_SAMPLE_RATE or armed by an admin)
+    from app.profiling import init_profiling
+    init_profiling(app)
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
     
     # Context processor for templates
     @app.context_processor
@@ -0,0 +1 @@
+from app.admin.routes import admin_bp
@@ -0,0 +1,77 @@
+import os
+from flask import Blueprint, current_app, jsonify, request, send_from_directory, abort
+from app.auth.decorators import admin_required
+from app.profiling import arm_capture, armed_captures, list_profiles, profile_dir
+from app.slow_queries import slow_query_log
+from app.db_pool import pool_status
+
+# Create blueprint
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+@admin_bp.route('/profiles')
+@admin_required
+def profiles():
+    """List armed captures and the most recent request profiles"""
+    return jsonify({
+        'sample_rate': current_app.config.get('PROFILE_SAMPLE_RATE', 0.0),
+        'armed': armed_captures(),
+        'profiles': list_profiles(limit=request.args.get('limit', 50, type=int))
+    })
+
+
+@admin_bp.route('/profiles/arm', methods=['POST'])
+@admin_required
+def arm_profile():
+    """Profile the next N requests to an endpoint in this worker"""
+    data = request.get_json(silent=True) or request.form
+    endpoint = data.get('endpoint')
+    try:
+        count = int(data.get('count', 10))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'count must be an integer'}), 400
+
+    if endpoint not in current_app.view_functions:
+        return jsonify({'error': f'Unknown endpoint {endpoint!r}'}), 400
+
+    mode = data.get('mode')
+    if mode not in (None, 'sample', 'trace'):
+        return jsonify({'error': "mode must be 'sample' or 'trace'"}), 400
+
+    arm_capture(endpoint, count, mode)
+    return jsonify({'armed': armed_captures()})
+
+
+@admin_bp.route('/profiles/<name>.collapsed')
+@admin_required
+def download_profile(name):
+    """Download a profile's collapsed stacks for flame graph rendering"""
+    directory = profile_dir()
+    if not os.path.isfile(os.path.join(directory, f'{name}.collapsed')):
+        abort(404)
+    return send_from_directory(directory, f'{name}.collapsed', mimetype='text/plain')
+
+
+@admin_bp.route('/slow-queries')
+@admin_required
+def slow_queries():
+    """Show the most recent slow queries with their plans"""
+    return jsonify({
+        'threshold_ms': current_app.config.get('SLOW_QUERY_THRESHOLD_MS'),
+        'entries': slow_query_log.entries()
+    })
+
+
+@admin_bp.route('/slow-queries/clear', methods=['POST'])
+@admin_required
+def clear_slow_queries():
+    """Empty this worker's slow query log"""
+    slow_query_log.clear()
+    return jsonify({'cleared': True})
+
+
+@admin_bp.route('/db-pool')
+@admin_required
+def db_pool():
+    """Show the state of this worker's database connection pools"""
+    return jsonify(pool_status())
@@ -1 +1,2 @@
-from app.auth.routes import auth_bp
\ No newline at end of file
+from app.auth.routes import auth_bp
+from app.auth import commands
\ No newline at end of file
@@ -0,0 +1,89 @@
+import click
+from app.auth.routes import auth_bp
+from app.auth.identity_sync import sync_auth_identities
+
+
+@auth_bp.cli.command('sync-identities')
+@click.option('--per-page', default=1000, show_default=True, help='Users fetched per admin API page.')
+@click.option('--full', is_flag=True, help='Rewrite every identity instead of only those changed since the last sync.')
+def sync_identities(per_page, full):
+    """Mirror Supabase auth users into the local auth_identities table"""
+    result = sync_auth_identities(per_page=per_page, full=full)
+    click.echo(f"Read {result['read']} Supabase user(s), wrote {result['written']} identity row(s).")
+
+
+@auth_bp.cli.command('fake-supabase')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=54321, show_default=True)
+@click.option('--jwt-secret', default=None, help='Secret for signing access tokens.')
+@click.option('--latency-ms', default=0.0, show_default=True, help='Delay added to every request.')
+@click.option('--jitter-ms', default=0.0, show_default=True, help='Extra random delay of up to this much.')
+@click.option('--error-rate', default=0.0, show_default=True, help='Fraction of requests that fail.')
+@click.option('--error-status', default=503, show_default=True, help='Status code for injected failures.')
+@click.option('--users', default=0, show_default=True, help='Users to pre-register (loadtest<n>@example.com).')
+def fake_supabase(host, port, jwt_secret, latency_ms, jitter_ms, error_rate, error_status, users):
+    """Serve a local stand-in for the Supabase auth API"""
+    from app.auth.fake_supabase import DEFAULT_JWT_SECRET, FakeSupabaseAuth, FakeSupabaseServer
+    from app.auth.loadtest import LOAD_TEST_PASSWORD, load_test_email
+
+    auth = FakeSupabaseAuth(
+        jwt_secret=jwt_secret or DEFAULT_JWT_SECRET,
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        error_rate=error_rate,
+        error_status=error_status,
+    )
+    for i in range(users):
+        auth.create_user(load_test_email(i), LOAD_TEST_PASSWORD)
+
+    server = FakeSupabaseServer(auth, host=host, port=port)
+    click.echo(f'Fake Supabase auth listening on {server.url}')
+    click.echo('Point the app at it with:')
+    click.echo(f'  SUPABASE_URL={server.url}')
+    click.echo(f"  SUPABASE_ANON_KEY={auth.api_key('anon')}")
+    click.echo(f"  SUPABASE_SERVICE_ROLE_KEY={auth.api_key('service_role')}")
+    click.echo(f'  SUPABASE_JWT_SECRET={auth.jwt_secret}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@auth_bp.cli.command('load-test')
+@click.option('--clients', default=8, show_default=True, help='Concurrent clients.')
+@click.option('--users', default=50, show_default=True, help='Distinct accounts to log in as.')
+@click.option('--logins', default=200, show_default=True, help='Login requests to send.')
+@click.option('--verifications', default=2000, show_default=True, help='verify-token requests to send.')
+@click.option('--remote-verify', is_flag=True, help='Verify tokens through get_user instead of the JWT secret.')
+@click.option('--latency-ms', default=0.0, show_default=True, help='Fake Supabase latency per request.')
+@click.option('--jitter-ms', default=0.0, show_default=True, help='Fake Supabase latency jitter.')
+@click.option('--error-rate', default=0.0, show_default=True, help='Fraction of fake Supabase requests that fail.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Save the results as JSON.')
+def load_test(clients, users, logins, verifications, remote_verify, latency_ms, jitter_ms, error_rate, output):
+    """Measure login and token verification throughput against a fake Supabase on a scratch database"""
+    import json
+    from app.auth.loadtest import run_auth_load_test
+
+    results = run_auth_load_test(
+        clients=clients,
+        users=users,
+        logins=logins,
+        verifications=verifications,
+        local_verification=not remote_verify,
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        error_rate=error_rate,
+        progress=click.echo,
+    )
+
+    for phase in ('login', 'verify_token'):
+        summary = results[phase]
+        click.echo(f"{phase:<13} p50 {summary.get('p50_ms')}ms  p95 {summary.get('p95_ms')}ms  "
+                   f"p99 {summary.get('p99_ms')}ms  {summary['throughput_rps']} req/s")
+    click.echo(f"Supabase requests: {results['supabase_requests']}")
+    click.echo(f"Token cache: {results['token_cache']}")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        click.echo(f'Saved results to {output}')
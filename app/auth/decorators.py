@@ -1,8 +1,9 @@
 from functools import wraps
-from flask import request, session, g, current_app, flash, redirect, url_for
+from flask import request, session, g, current_app, flash, redirect, url_for, abort
+import hmac
 from flask_login import current_user, login_user
-from app.models import User
-from app.supabase_client import get_supabase_client
+from app.extensions import db, login_manager, csrf
+from app.auth.tokens import authenticate_token
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,25 +20,10 @@ def supabase_auth_required(f):
         if auth_header and auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
             try:
-                # Validate token with Supabase
-                supabase = get_supabase_client()
-                user_data = supabase.auth.get_user(token)
+                # Validate token locally (or with Supabase) and find or create local user
+                local_user = authenticate_token(token)
                 
-                if user_data.user:
-                    # Find or create local user
-                    local_user = User.find_by_supabase_id(user_data.user.id)
-                    if not local_user:
-                        # Create local user profile if doesn't exist
-                        local_user = User(
-                            supabase_id=user_data.user.id,
-                            email=user_data.user.email,
-                            full_name=user_data.user.user_metadata.get('full_name', 'Unknown'),
-                            phone=user_data.user.phone or ''
-                        )
-                        from app.extensions import db
-                        db.session.add(local_user)
-                        db.session.commit()
-                    
+                if local_user:
                     # Set current user
                     g.current_user = local_user
                     if not current_user.is_authenticated:
@@ -49,6 +35,7 @@ def supabase_auth_required(f):
                     return redirect(url_for('auth.login'))
                     
             except Exception as e:
+                db.session.rollback()
                 logger.error(f"Supabase token validation failed: {e}")
                 flash('Authentication failed', 'error')
                 return redirect(url_for('auth.login'))
@@ -72,11 +59,9 @@ def get_current_user_from_token():
     if auth_header and auth_header.startswith('Bearer '):
         token = auth_header.split(' ')[1]
         try:
-            supabase = get_supabase_client()
-            user_data = supabase.auth.get_user(token)
-            
-            if user_data.user:
-                return User.find_by_supabase_id(user_data.user.id)
+            local_user = authenticate_token(token, create_missing=False)
+            if local_user:
+                return local_user
         except Exception as e:
             logger.error(f"Token validation failed: {e}")
     
@@ -84,4 +69,57 @@ def get_current_user_from_token():
     if current_user.is_authenticated:
         return current_user
     
-    return None 
\ No newline at end of file
+    return None 
+
+
+def is_admin(user):
+    """Check whether a user's email is listed in ADMIN_EMAILS"""
+    if not user or not user.is_authenticated or not user.email:
+        return False
+    return user.email.lower() in current_app.config.get('ADMIN_EMAILS', set())
+
+
+def admin_required(f):
+    """
+    Decorator for operational endpoints that only admins may see.
+    A Bearer token matching ADMIN_API_TOKEN is also accepted, so that
+    scrapers and scripts can call them without a session.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        api_token = current_app.config.get('ADMIN_API_TOKEN')
+        auth_header = request.headers.get('Authorization', '')
+        if api_token and auth_header.startswith('Bearer ') and hmac.compare_digest(auth_header[7:], api_token):
+            return f(*args, **kwargs)
+
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not is_admin(current_user):
+            abort(403)
+        
+        # Admin views are CSRF-exempt for token callers; check session callers here
+        if current_app.config.get('WTF_CSRF_ENABLED', True):
+            csrf.protect()
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def payments_token_required(f):
+    """
+    Decorator for payment provider callbacks, which carry a Bearer token
+    matching PAYMENTS_API_TOKEN instead of a user session. The endpoint
+    is disabled while PAYMENTS_API_TOKEN is unset.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        api_token = current_app.config.get('PAYMENTS_API_TOKEN')
+        if not api_token:
+            abort(404)
+
+        auth_header = request.headers.get('Authorization', '')
+        if not (auth_header.startswith('Bearer ') and hmac.compare_digest(auth_header[7:], api_token)):
+            abort(401)
+        return f(*args, **kwargs)
+
+    return decorated_function
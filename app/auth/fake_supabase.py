@@ -0,0 +1,260 @@
+"""
+Local Supabase auth stand-in
+Implements the GoTrue endpoints the app calls (admin create_user and
+list_users, password and PKCE sign-in, get_user and admin sign_out) in
+memory, with configurable latency and error injection, so auth paths can
+be load-tested without a live Supabase project. Access tokens are HS256
+JWTs signed with jwt_secret, so the app can verify them locally when
+SUPABASE_JWT_SECRET is set to the same value.
+"""
+
+import random
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+import jwt
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JWT_SECRET = 'fake-supabase-jwt-secret'
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _error(status, message):
+    return jsonify({'code': status, 'msg': message, 'error_description': message}), status
+
+
+class FakeSupabaseAuth:
+    """
+    In-memory GoTrue server
+
+    Args:
+        jwt_secret (str): Secret used to sign access tokens
+        latency_ms (float): Delay added to every request
+        jitter_ms (float): Extra random delay of up to this much
+        error_rate (float): Fraction of requests answered with error_status
+        error_status (int): Status code for injected errors
+        token_ttl (int): Access token lifetime in seconds
+    """
+
+    def __init__(self, jwt_secret=DEFAULT_JWT_SECRET, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 error_status=503, token_ttl=3600):
+        self.jwt_secret = jwt_secret
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_ttl = token_ttl
+
+        self.users = {}
+        self.passwords = {}
+        self.emails = {}
+        self.auth_codes = {}
+        self.revoked_sessions = set()
+        self.request_counts = {}
+        self._lock = threading.Lock()
+        self.app = self._create_app()
+
+    def create_user(self, email, password, user_metadata=None):
+        """
+        Add a user directly, as admin.create_user would
+
+        Returns:
+            dict: The user as GoTrue returns it, or None if the email is taken
+        """
+        email = email.lower()
+        now = _now_iso()
+        user = {
+            'id': str(uuid.uuid4()),
+            'aud': 'authenticated',
+            'role': 'authenticated',
+            'email': email,
+            'phone': '',
+            'app_metadata': {'provider': 'email', 'providers': ['email']},
+            'user_metadata': user_metadata or {},
+            'identities': [],
+            'email_confirmed_at': now,
+            'created_at': now,
+            'updated_at': now,
+        }
+        with self._lock:
+            if email in self.emails:
+                return None
+            self.users[user['id']] = user
+            self.passwords[user['id']] = password
+            self.emails[email] = user['id']
+        return user
+
+    def api_key(self, role):
+        """Build an anon or service_role API key; supabase-py requires JWT-shaped keys"""
+        return jwt.encode({'iss': 'supabase', 'role': role}, self.jwt_secret, algorithm='HS256')
+
+    def issue_auth_code(self, user_id):
+        """Create a one-time PKCE auth code for a user"""
+        code = secrets.token_urlsafe(16)
+        with self._lock:
+            self.auth_codes[code] = user_id
+        return code
+
+    def _session_for(self, user):
+        """Build a GoTrue session response for a user"""
+        issued_at = int(time.time())
+        session_id = str(uuid.uuid4())
+        claims = {
+            'sub': user['id'],
+            'aud': 'authenticated',
+            'role': 'authenticated',
+            'email': user['email'],
+            'phone': user['phone'],
+            'user_metadata': user['user_metadata'],
+            'session_id': session_id,
+            'iat': issued_at,
+            'exp': issued_at + self.token_ttl,
+        }
+        return {
+            'access_token': jwt.encode(claims, self.jwt_secret, algorithm='HS256'),
+            'refresh_token': secrets.token_urlsafe(24),
+            'token_type': 'bearer',
+            'expires_in': self.token_ttl,
+            'expires_at': issued_at + self.token_ttl,
+            'user': user,
+        }
+
+    def _bearer_claims(self):
+        """Decode the request's Bearer token, or return None if it isn't valid"""
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return None
+        try:
+            claims = jwt.decode(header[7:], self.jwt_secret, algorithms=['HS256'], audience='authenticated')
+        except jwt.InvalidTokenError:
+            return None
+        if claims.get('session_id') in self.revoked_sessions:
+            return None
+        return claims
+
+    def _create_app(self):
+        app = Flask(__name__)
+
+        @app.before_request
+        def inject_latency_and_errors():
+            with self._lock:
+                self.request_counts[request.path] = self.request_counts.get(request.path, 0) + 1
+            delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+            if delay:
+                time.sleep(delay / 1000)
+            if self.error_rate and random.random() < self.error_rate:
+                return _error(self.error_status, 'Injected failure')
+
+        @app.route('/auth/v1/admin/users', methods=['POST'])
+        def admin_create_user():
+            data = request.get_json(silent=True) or {}
+            if not data.get('email'):
+                return _error(422, 'An email address is required')
+            user = self.create_user(data['email'], data.get('password'), data.get('user_metadata'))
+            if user is None:
+                return _error(422, 'A user with this email address has already been registered')
+            return jsonify(user)
+
+        @app.route('/auth/v1/admin/users', methods=['GET'])
+        def admin_list_users():
+            page = max(int(request.args.get('page') or 1), 1)
+            per_page = max(int(request.args.get('per_page') or 50), 1)
+            with self._lock:
+                users = list(self.users.values())
+            start = (page - 1) * per_page
+            return jsonify({'users': users[start:start + per_page], 'aud': 'authenticated'})
+
+        @app.route('/auth/v1/token', methods=['POST'])
+        def token():
+            data = request.get_json(silent=True) or {}
+            grant_type = request.args.get('grant_type')
+
+            if grant_type == 'password':
+                user_id = self.emails.get((data.get('email') or '').lower())
+                if not user_id or self.passwords.get(user_id) != data.get('password'):
+                    return jsonify({'error': 'invalid_grant', 'error_description': 'Invalid login credentials'}), 400
+                return jsonify(self._session_for(self.users[user_id]))
+
+            if grant_type == 'pkce':
+                with self._lock:
+                    user_id = self.auth_codes.pop(data.get('auth_code'), None)
+                if not user_id:
+                    return jsonify({'error': 'invalid_grant', 'error_description': 'Invalid auth code'}), 400
+                return jsonify(self._session_for(self.users[user_id]))
+
+            return _error(400, f'Unsupported grant_type {grant_type}')
+
+        @app.route('/auth/v1/user', methods=['GET'])
+        def get_user():
+            claims = self._bearer_claims()
+            user = self.users.get(claims['sub']) if claims else None
+            if not user:
+                return _error(401, 'invalid JWT')
+            return jsonify(user)
+
+        @app.route('/auth/v1/logout', methods=['POST'])
+        def logout():
+            claims = self._bearer_claims()
+            if claims:
+                with self._lock:
+                    self.revoked_sessions.add(claims['session_id'])
+            return '', 204
+
+        return app
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that doesn't log every request"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class FakeSupabaseServer:
+    """
+    Runs a FakeSupabaseAuth on a background thread
+
+    Args:
+        auth (FakeSupabaseAuth): The fake to serve
+        host (str): Interface to bind
+        port (int): Port to bind, 0 for any free port
+        quiet (bool): Don't log each request
+    """
+
+    def __init__(self, auth, host='127.0.0.1', port=0, quiet=False):
+        self.auth = auth
+        handler = _QuietRequestHandler if quiet else None
+        self._server = make_server(host, port, auth.app, threaded=True, request_handler=handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self._server.host}:{self._server.server_port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,113 @@
+"""
+Supabase identity mirror sync
+Copies Supabase auth users into the local auth_identities table so
+email lookups are an indexed local query instead of a scan over
+admin.list_users(). Sign-ups mirror the user they create in the same
+transaction as the local User, so only users created outside the app
+wait for the next `flask auth sync-identities` to become findable.
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import func
+from app.dialects import conflict_insert
+from app.extensions import db
+from app.models import AuthIdentity
+from app.supabase_client import get_supabase_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _to_naive_utc(value):
+    """Convert an aware datetime to the naive UTC values stored locally"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def identity_row(supabase_user):
+    """Build an auth_identities row from a Supabase user"""
+    metadata = supabase_user.user_metadata or {}
+    return {
+        'supabase_id': supabase_user.id,
+        'email': AuthIdentity.normalize_email(supabase_user.email),
+        'phone': supabase_user.phone or metadata.get('phone') or None,
+        'full_name': metadata.get('full_name'),
+        'updated_at': _to_naive_utc(supabase_user.updated_at or supabase_user.created_at),
+        'synced_at': datetime.utcnow(),
+    }
+
+
+def upsert_identities(rows):
+    """Insert or update mirrored identities in one statement"""
+    if not rows:
+        return
+    statement = conflict_insert(AuthIdentity)
+    statement = statement.on_conflict_do_update(
+        index_elements=['supabase_id'],
+        set_={
+            column: statement.excluded[column]
+            for column in ('email', 'phone', 'full_name', 'updated_at', 'synced_at')
+        }
+    )
+    db.session.execute(statement, rows)
+
+
+def mirror_identity(supabase_user):
+    """Upsert the mirror row for a user returned by admin.create_user; nothing is committed"""
+    upsert_identities([identity_row(supabase_user)])
+
+
+def find_identity_by_email(email):
+    """
+    Find a Supabase identity by email in the mirror
+
+    The admin API is never enumerated here; a user missing from the
+    mirror is picked up by the next `flask auth sync-identities`.
+
+    Returns:
+        AuthIdentity: The mirrored identity, or None if it isn't mirrored
+    """
+    identity = AuthIdentity.find_by_email(email)
+    if identity is None:
+        logger.info("No mirrored identity for the email; it appears after the next identity sync")
+    return identity
+
+
+def sync_auth_identities(per_page=1000, full=False):
+    """
+    Mirror Supabase users that changed since the last sync
+
+    The cursor is the newest updated_at already mirrored. The admin API
+    only pages, so every page is read, but only users updated since the
+    cursor are written, and each page is upserted in one statement.
+
+    Returns:
+        dict: Counts of users read and identities written
+    """
+    cursor = None if full else db.session.query(func.max(AuthIdentity.updated_at)).scalar()
+    supabase = get_supabase_client()
+
+    read = 0
+    written = 0
+    page = 1
+    while True:
+        users = supabase.auth.admin.list_users(page=page, per_page=per_page)
+        if not users:
+            break
+        read += len(users)
+
+        rows = [identity_row(user) for user in users]
+        if cursor is not None:
+            rows = [row for row in rows if row['updated_at'] is None or row['updated_at'] >= cursor]
+
+        upsert_identities(rows)
+        db.session.commit()
+        written += len(rows)
+
+        if len(users) < per_page:
+            break
+        page += 1
+
+    logger.info(f"Synced auth identities: read {read}, wrote {written}")
+    return {'read': read, 'written': written}
@@ -0,0 +1,196 @@
+"""
+Auth load driver
+Runs the app's login and token verification APIs from concurrent
+clients against a local FakeSupabaseAuth server and reports throughput
+and latency percentiles for each. The run uses its own app on a scratch
+SQLite database (or TEST_DATABASE_URL), never the configured one.
+"""
+
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.auth.fake_supabase import FakeSupabaseAuth, FakeSupabaseServer
+from app.auth.tokens import token_cache_stats
+from app.benchmarks import percentile
+from app.extensions import db
+from app.models import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_PASSWORD = 'load-test-password'
+
+
+
+def load_test_email(i, run=None):
+    return f'loadtest-{run}-{i}@example.com' if run else f'loadtest{i}@example.com'
+
+
+def prepare_users(auth, count):
+    """
+    Register users with the fake server and insert a local profile for each
+
+    Every run gets fresh addresses, so a reused TEST_DATABASE_URL never
+    has its existing rows touched.
+
+    Returns:
+        list: (email, password) pairs
+    """
+    run = secrets.token_hex(4)
+    phone_prefix = int(run, 16) % 10 ** 6
+    credentials = []
+    rows = []
+    for i in range(count):
+        email = load_test_email(i, run)
+        user = auth.create_user(email, LOAD_TEST_PASSWORD, {'full_name': f'Load Test {i}'})
+        credentials.append((email, LOAD_TEST_PASSWORD))
+        rows.append({
+            'supabase_id': user['id'],
+            'username': email.split('@')[0],
+            'full_name': 'Load Test',
+            'email': email,
+            'phone': f'+0{phone_prefix:06d}{i:06d}',
+        })
+
+    if rows:
+        db.session.execute(db.insert(User), rows)
+    db.session.commit()
+    return credentials
+
+
+def create_load_test_app(database_url, **config):
+    """
+    Create a testing app on database_url with its tables created
+    """
+    from app import create_app
+
+    app = create_app('testing', config_overrides=dict(config, SQLALCHEMY_DATABASE_URI=database_url))
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _run_phase(app, clients, operations, request_for):
+    """
+    Issue operations requests from a pool of clients
+
+    Args:
+        request_for (callable): Maps an operation index to (path, json body)
+
+    Returns:
+        tuple: (summary dict, list of JSON responses from successful requests)
+    """
+    local = threading.local()
+    latencies = []
+    responses = []
+    errors = {}
+    lock = threading.Lock()
+
+    def run(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        path, body = request_for(i)
+
+        with app.app_context():
+            started = time.perf_counter()
+            response = client.post(path, json=body)
+            elapsed = time.perf_counter() - started
+
+        with lock:
+            latencies.append(elapsed * 1000)
+            if response.status_code == 200:
+                responses.append(response.get_json())
+            else:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(run, range(operations)))
+    seconds = time.perf_counter() - started
+
+    summary = {
+        'requests': operations,
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(operations / seconds, 1) if seconds else None,
+    }
+    if latencies:
+        summary.update({f'p{pct}_ms': round(percentile(latencies, pct), 3) for pct in (50, 95, 99)})
+    return summary, responses
+
+
+def run_auth_load_test(clients=8, users=50, logins=200, verifications=2000, local_verification=True,
+                       latency_ms=0, jitter_ms=0, error_rate=0.0, progress=None):
+    """
+    Measure login and token verification throughput
+
+    Starts a FakeSupabaseAuth on a free port and runs a separate testing
+    app pointed at it, on TEST_DATABASE_URL if set and otherwise on a
+    scratch SQLite file that is removed afterwards. With
+    local_verification the app gets the fake's JWT secret and verifies
+    tokens itself; otherwise every cache miss calls get_user on the fake.
+
+    Returns:
+        dict: Per-phase summaries, fake server request counts and token cache stats
+    """
+    auth = FakeSupabaseAuth(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate)
+    scratch_dir = tempfile.mkdtemp(prefix='susu-loadtest-')
+    test_database_url = os.environ.get('TEST_DATABASE_URL')
+    database_url = test_database_url or f"sqlite:///{os.path.join(scratch_dir, 'loadtest.db')}"
+
+    with FakeSupabaseServer(auth, quiet=True) as server:
+        app = create_load_test_app(
+            database_url,
+            SUPABASE_URL=server.url,
+            SUPABASE_ANON_KEY=auth.api_key('anon'),
+            SUPABASE_SERVICE_ROLE_KEY=auth.api_key('service_role'),
+            SUPABASE_JWT_SECRET=auth.jwt_secret if local_verification else None,
+            SUPABASE_JWKS_URL=None,
+        )
+        try:
+            with app.app_context():
+                credentials = prepare_users(auth, users)
+            if progress:
+                database = 'TEST_DATABASE_URL' if test_database_url else 'a scratch SQLite database'
+                progress(f'Fake Supabase at {server.url} with {users} users on {database}')
+
+            def login_request(i):
+                email, password = credentials[i % len(credentials)]
+                return '/auth/api/login', {'email': email, 'password': password}
+
+            login_summary, login_responses = _run_phase(app, clients, logins, login_request)
+            if progress:
+                progress(f"login         {login_summary['throughput_rps']} req/s, errors {login_summary['errors']}")
+
+            tokens = [response['access_token'] for response in login_responses if response.get('access_token')]
+            if not tokens:
+                raise RuntimeError('No logins succeeded, so there are no tokens to verify')
+
+            def verify_request(i):
+                return '/auth/api/verify-token', {'token': tokens[i % len(tokens)]}
+
+            verify_summary, _ = _run_phase(app, clients, verifications, verify_request)
+            if progress:
+                progress(f"verify-token  {verify_summary['throughput_rps']} req/s, errors {verify_summary['errors']}")
+        finally:
+            with app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'clients': clients,
+        'local_verification': local_verification,
+        'fake': {'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'error_rate': error_rate},
+        'login': login_summary,
+        'verify_token': verify_summary,
+        'supabase_requests': auth.request_counts,
+        'token_cache': token_cache_stats(),
+    }
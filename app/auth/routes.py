@@ -1,10 +1,13 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from app.extensions import db
-from app.models import User
+from app.models import User, user_cache
 from app.auth.forms import RegistrationForm, LoginForm
 from app.supabase_client import get_supabase_client, get_supabase_anon_client
-from app.auth.decorators import supabase_auth_required
+from app.auth.decorators import admin_required, supabase_auth_required
+from app.auth.usernames import save_with_unique_username, username_base_from_email
+from app.auth.identity_sync import find_identity_by_email, mirror_identity
+from app.auth.tokens import authenticate_token, get_token_identity, token_cache_stats
 import logging
 
 # Create blueprint
@@ -63,6 +66,7 @@ def register():
                 )
                 
                 db.session.add(user)
+                mirror_identity(auth_response.user)
                 db.session.commit()
                 
                 logger.info(f"User created in local database with ID: {user.id}")
@@ -286,26 +290,14 @@ def auth_callback():
             # Find or create local user
             local_user = User.find_by_supabase_id(user_data.id)
             if not local_user:
-                # Generate a unique username from email if not provided
-                email_username = user_data.email.split('@')[0]
-                base_username = email_username
-                counter = 1
-                username = base_username
-                
-                # Ensure username is unique
-                while User.query.filter_by(username=username).first():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-                
                 local_user = User(
                     supabase_id=user_data.id,
-                    username=username,
                     email=user_data.email,
                     full_name=user_data.user_metadata.get('full_name', 'Unknown'),
                     phone=user_data.user_metadata.get('phone', '')
                 )
-                db.session.add(local_user)
-                db.session.commit()
+                # Generate a unique username from email if not provided
+                save_with_unique_username(local_user, username_base_from_email(user_data.email))
                 logger.info(f"Created new local user: {local_user.id}")
             
             # Log in user
@@ -323,46 +315,23 @@ def auth_callback():
             if email:
                 logger.info(f"Trying to find user by email: {email}")
                 try:
-                    # Find user in Supabase
-                    supabase = get_supabase_client()
-                    supabase_users_response = supabase.auth.admin.list_users()
+                    # Find user in the local mirror of Supabase identities
+                    identity = find_identity_by_email(email)
                     
-                    if hasattr(supabase_users_response, 'users') and supabase_users_response.users:
-                        supabase_users = supabase_users_response.users
-                    elif isinstance(supabase_users_response, list):
-                        supabase_users = supabase_users_response
-                    else:
-                        supabase_users = []
-                    
-                    # Find user by email
-                    supabase_user = next((u for u in supabase_users if u.email == email), None)
-                    
-                    if supabase_user:
-                        logger.info(f"Found user in Supabase: {supabase_user.id}")
+                    if identity:
+                        logger.info(f"Found user in Supabase mirror: {identity.supabase_id}")
                         
                         # Find or create local user
-                        local_user = User.find_by_supabase_id(supabase_user.id)
+                        local_user = User.find_by_supabase_id(identity.supabase_id)
                         if not local_user:
-                            # Generate a unique username from email if not provided
-                            email_username = supabase_user.email.split('@')[0]
-                            base_username = email_username
-                            counter = 1
-                            username = base_username
-                            
-                            # Ensure username is unique
-                            while User.query.filter_by(username=username).first():
-                                username = f"{base_username}{counter}"
-                                counter += 1
-                            
                             local_user = User(
-                                supabase_id=supabase_user.id,
-                                username=username,
-                                email=supabase_user.email,
-                                full_name=supabase_user.user_metadata.get('full_name', 'Unknown'),
-                                phone=supabase_user.user_metadata.get('phone', '')
+                                supabase_id=identity.supabase_id,
+                                email=identity.email,
+                                full_name=identity.full_name or 'Unknown',
+                                phone=identity.phone or ''
                             )
-                            db.session.add(local_user)
-                            db.session.commit()
+                            # Generate a unique username from email if not provided
+                            save_with_unique_username(local_user, username_base_from_email(identity.email))
                             logger.info(f"Created local user profile: {local_user.id}")
                         
                         # Log in user
@@ -415,6 +384,7 @@ def signup():
             )
             
             db.session.add(user)
+            mirror_identity(auth_response.user)
             db.session.commit()
             
             return jsonify({
@@ -485,20 +455,18 @@ def verify_token():
         return jsonify({'error': 'Token is required'}), 400
     
     try:
-        supabase = get_supabase_client()
-        user_data = supabase.auth.get_user(token)
+        # Find local user (served from the token cache when possible)
+        local_user = authenticate_token(token, create_missing=False)
+        if local_user:
+            return jsonify({
+                'valid': True,
+                'user_id': local_user.id,
+                'email': local_user.email
+            }), 200
         
-        if user_data.user:
-            # Find local user
-            local_user = User.find_by_supabase_id(user_data.user.id)
-            if local_user:
-                return jsonify({
-                    'valid': True,
-                    'user_id': local_user.id,
-                    'email': local_user.email
-                }), 200
-            else:
-                return jsonify({'error': 'Local user not found'}), 404
+        identity, _ = get_token_identity(token)
+        if identity:
+            return jsonify({'error': 'Local user not found'}), 404
         else:
             return jsonify({'error': 'Invalid token'}), 401
             
@@ -507,6 +475,16 @@ def verify_token():
         return jsonify({'error': 'Token verification failed'}), 500
 
 
+@auth_bp.route('/debug/cache-stats')
+@admin_required
+def cache_stats():
+    """Debug route showing hit/miss counters for this process's auth caches"""
+    return jsonify({
+        'user_cache': user_cache.stats(),
+        'token_cache': token_cache_stats()
+    })
+
+
 # ==================================================
 # DIRECT GOOGLE OAUTH ROUTES
 # ==================================================
@@ -578,28 +556,18 @@ def google_callback():
             })
             
             if hasattr(auth_response, 'user') and auth_response.user:
-                # Generate a unique username from email
-                email_username = user_info['email'].split('@')[0]
-                base_username = email_username
-                counter = 1
-                username = base_username
-                
-                # Ensure username is unique
-                while User.query.filter_by(username=username).first():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-                
-                # Create user in local database
+                # Create user in local database with a unique username from email
                 user = User(
                     supabase_id=auth_response.user.id,
-                    username=username,
                     full_name=user_info.get('name', 'Unknown'),
                     email=user_info['email'],
                     phone=user_info.get('phone', '') or '0000000000'  # Default phone
                 )
-                
-                db.session.add(user)
-                db.session.commit()
+                save_with_unique_username(
+                    user,
+                    username_base_from_email(user_info['email']),
+                    before_commit=lambda: mirror_identity(auth_response.user)
+                )
                 
                 logger.info(f"Created new user via Google OAuth: {user.email}")
             else:
@@ -0,0 +1,197 @@
+"""
+Supabase access token verification
+Verifies JWTs locally using the project's JWT secret or JWKS and caches
+token -> local user id, so Bearer-authenticated requests don't need a
+round trip to Supabase. Falls back to remote verification when no
+local key is configured.
+"""
+
+import hashlib
+import time
+from types import SimpleNamespace
+import jwt
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.cache import TTLCache
+from app.auth.usernames import save_with_unique_username, username_base_from_email
+from app.extensions import db
+from app.models import User
+from app.supabase_client import get_supabase_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Maps sha256(token) -> local User.id
+_token_cache = TTLCache(maxsize=10000, ttl=300)
+
+# JWKS clients keyed by URL; PyJWKClient caches the fetched keys itself
+_jwks_clients = {}
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when no local key is available to verify a token"""
+
+
+def init_app(app):
+    """Size the token cache from the app config"""
+    _token_cache.configure(
+        maxsize=app.config.get('TOKEN_CACHE_SIZE', 10000),
+        ttl=app.config.get('TOKEN_CACHE_TTL', 300)
+    )
+
+
+def _cache_key(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _get_signing_key(token):
+    """Get the key to verify a token with, or raise if none is configured"""
+    config = current_app.config
+
+    secret = config.get('SUPABASE_JWT_SECRET')
+    if secret:
+        return secret, ['HS256']
+
+    jwks_url = config.get('SUPABASE_JWKS_URL')
+    if jwks_url:
+        client = _jwks_clients.get(jwks_url)
+        if client is None:
+            client = jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=config.get('SUPABASE_JWKS_CACHE_TTL', 600))
+            _jwks_clients[jwks_url] = client
+        try:
+            return client.get_signing_key_from_jwt(token).key, ['RS256', 'ES256']
+        except jwt.PyJWKClientError as e:
+            raise LocalVerificationUnavailable(str(e))
+
+    raise LocalVerificationUnavailable('No SUPABASE_JWT_SECRET or SUPABASE_JWKS_URL configured')
+
+
+def decode_token(token):
+    """
+    Verify a token's signature and expiry locally
+
+    Returns:
+        dict: The token claims
+
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid or expired
+        LocalVerificationUnavailable: If no local key is configured
+    """
+    key, algorithms = _get_signing_key(token)
+    return jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=current_app.config.get('SUPABASE_JWT_AUDIENCE', 'authenticated'),
+        options={'require': ['exp', 'sub']}
+    )
+
+
+def get_token_identity(token):
+    """
+    Get the Supabase identity behind a token
+
+    Verifies locally when possible and falls back to Supabase otherwise.
+
+    Returns:
+        tuple: (identity, expires_at) where identity has id, email, phone
+            and user_metadata attributes, or (None, None) if invalid
+    """
+    try:
+        claims = decode_token(token)
+    except jwt.InvalidTokenError as e:
+        logger.info(f"Rejected token locally: {e}")
+        return None, None
+    except LocalVerificationUnavailable:
+        claims = None
+
+    if claims is not None:
+        identity = SimpleNamespace(
+            id=claims['sub'],
+            email=claims.get('email'),
+            phone=claims.get('phone'),
+            user_metadata=claims.get('user_metadata') or {}
+        )
+        return identity, claims['exp']
+
+    # Remote verification
+    supabase = get_supabase_client()
+    user_data = supabase.auth.get_user(token)
+    if not user_data or not user_data.user:
+        return None, None
+
+    try:
+        expires_at = jwt.decode(token, options={'verify_signature': False}).get('exp')
+    except jwt.InvalidTokenError:
+        expires_at = None
+    return user_data.user, expires_at
+
+
+def _create_local_user(identity):
+    """
+    Create the local profile for a Supabase user, with a unique username
+
+    A concurrent request that created the same profile first wins, and
+    its row is returned.
+
+    Raises:
+        IntegrityError: If the insert fails for another reason; the
+            session has been rolled back
+    """
+    local_user = User(
+        supabase_id=identity.id,
+        email=identity.email,
+        full_name=(identity.user_metadata or {}).get('full_name', 'Unknown'),
+        phone=identity.phone or ''
+    )
+    try:
+        return save_with_unique_username(local_user, username_base_from_email(identity.email))
+    except IntegrityError:
+        db.session.rollback()
+        existing = User.find_by_supabase_id(identity.id)
+        if existing is None:
+            raise
+        return existing
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def authenticate_token(token, create_missing=True):
+    """
+    Resolve a Bearer token to a local user
+
+    Args:
+        token (str): Supabase access token
+        create_missing (bool): Create a local profile for unknown Supabase users
+
+    Returns:
+        User: The local user, or None if the token is invalid or no
+            local user exists
+    """
+    cache_key = _cache_key(token)
+    user_id = _token_cache.get(cache_key)
+    if user_id is not None:
+        user = db.session.get(User, user_id)
+        if user:
+            return user
+        _token_cache.pop(cache_key)
+
+    identity, expires_at = get_token_identity(token)
+    if identity is None:
+        return None
+
+    local_user = User.find_by_supabase_id(identity.id)
+    if not local_user and create_missing:
+        local_user = _create_local_user(identity)
+
+    if local_user:
+        ttl = expires_at - time.time() if expires_at else None
+        _token_cache.set(cache_key, local_user.id, ttl=ttl)
+
+    return local_user
+
+
+def token_cache_stats():
+    """Get hit/miss counters for the token cache"""
+    return _token_cache.stats()
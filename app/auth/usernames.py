@@ -0,0 +1,79 @@
+"""
+Username allocation for sign-ups that don't choose a username (OAuth)
+"""
+
+import re
+from sqlalchemy import Integer, case, cast, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Leave room for a numeric suffix within the 50 character column
+MAX_BASE_LENGTH = 40
+# Longest suffix considered, so the CAST fits a 32-bit integer
+MAX_SUFFIX_DIGITS = 9
+
+
+def username_base_from_email(email):
+    """Get the base username for an email address"""
+    return email.split('@')[0][:MAX_BASE_LENGTH]
+
+
+def next_available_username(base):
+    """
+    Find the next free username for a base in a single query
+
+    Returns base itself if it is free, otherwise base followed by one
+    more than the highest numeric suffix in use. The suffix maximum is
+    computed in SQL over the usernames that are base followed only by
+    digits, so no usernames are loaded.
+    """
+    suffix = func.substr(User.username, len(base) + 1)
+    numbered = User.username.regexp_match(f'^{re.escape(base)}[0-9]{{1,{MAX_SUFFIX_DIGITS}}}$')
+    base_taken, max_suffix = db.session.execute(
+        select(
+            func.max(case((User.username == base, 1), else_=0)),
+            func.max(case((numbered, cast(suffix, Integer)), else_=None))
+        )
+        .where(User.username.startswith(base, autoescape=True), or_(User.username == base, numbered))
+    ).one()
+
+    if not base_taken:
+        return base
+    return f"{base}{(max_suffix or 0) + 1}"
+
+
+def save_with_unique_username(user, base, max_attempts=5, before_commit=None):
+    """
+    Assign the next free username to a new user and commit it
+
+    If another request claims the same username first, the unique
+    constraint rejects the insert and a fresh username is allocated.
+
+    Args:
+        before_commit (callable): Called before every commit attempt to
+            add related writes to the same transaction, since a retry
+            rolls back the previous attempt's writes
+
+    Raises:
+        IntegrityError: If the insert fails for another reason
+        RuntimeError: If no username could be claimed after max_attempts
+    """
+    for attempt in range(max_attempts):
+        user.username = next_available_username(base)
+        db.session.add(user)
+        if before_commit:
+            before_commit()
+        try:
+            db.session.commit()
+            return user
+        except IntegrityError:
+            db.session.rollback()
+            if not User.query.filter_by(username=user.username).first():
+                raise
+            logger.info(f"Username {user.username} was claimed concurrently, retrying")
+
+    raise RuntimeError(f"Could not allocate a username for {base}")
@@ -0,0 +1,467 @@
+"""
+Endpoint benchmarks
+Replays the blueprint hot paths through the Flask test client against
+the current database (normally one loaded with `flask seed`) and records
+latency percentiles and SQL statement counts per endpoint. Results are
+saved as JSON baselines that later runs can be compared against.
+The SQLite concurrency benchmark runs on its own scratch database.
+"""
+
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, url_for
+from sqlalchemy import create_engine, event, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.models import Group, Membership, GroupInvitation, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Metrics checked by compare_results, as (key, label)
+COMPARED_METRICS = (('p50_ms', 'p50'), ('p95_ms', 'p95'), ('sql_statements', 'SQL statements'))
+
+
+class BenchmarkError(Exception):
+    """Raised when the dataset has no rows to build a scenario from"""
+
+
+class Scenario:
+    """
+    One benchmarked request
+
+    Args:
+        endpoint (str): Flask endpoint name
+        user_id (int): User the request is made as
+        url_values (dict): URL values for the endpoint
+        method (str): HTTP method
+        setup (callable): Called before each request; may return extra URL values
+        teardown (callable): Called after each request to undo its writes
+    """
+
+    def __init__(self, endpoint, user_id, url_values=None, method='GET', setup=None, teardown=None):
+        self.endpoint = endpoint
+        self.user_id = user_id
+        self.url_values = url_values or {}
+        self.method = method
+        self.setup = setup
+        self.teardown = teardown
+
+
+def _first(query, message):
+    """Run a query for one row, raising BenchmarkError if there is none"""
+    row = db.session.execute(query.limit(1)).first()
+    if row is None:
+        raise BenchmarkError(message)
+    return row
+
+
+def _restore_group(group_id, user_id):
+    """Build a teardown that removes a joined membership and restores the group row"""
+    snapshot = db.session.execute(
+        db.select(Group.status, Group.member_count, Group.current_cycle, Group.version, Group.updated_at)
+        .where(Group.id == group_id)
+    ).one()._asdict()
+
+    def teardown():
+        db.session.execute(db.delete(Membership).where(
+            Membership.group_id == group_id, Membership.user_id == user_id
+        ))
+        db.session.execute(db.update(Group).where(Group.id == group_id).values(**snapshot))
+        db.session.commit()
+
+    return teardown
+
+
+def _non_member(group_id):
+    """Find a user who doesn't belong to a group"""
+    members = db.select(Membership.user_id).where(Membership.group_id == group_id)
+    return _first(
+        db.select(User.id).where(User.id.not_in(members)).order_by(User.id),
+        f'No user outside group {group_id} to join with'
+    ).id
+
+
+def build_scenarios():
+    """
+    Pick users and groups from the current dataset for each hot path
+
+    Read paths use the busiest rows available. The join paths use a
+    forming group with a free slot and undo their writes after every
+    request so each iteration sees the same state.
+
+    Returns:
+        list: Scenario objects
+    """
+    busiest_member = _first(
+        db.select(Membership.user_id)
+        .group_by(Membership.user_id)
+        .order_by(func.count().desc(), Membership.user_id),
+        'No memberships found; run `flask seed` first'
+    ).user_id
+
+    largest_group = _first(
+        db.select(Membership.group_id)
+        .where(Membership.user_id == busiest_member)
+        .join(Group, Group.id == Membership.group_id)
+        .order_by(Group.member_count.desc(), Group.id),
+        'No groups found'
+    ).group_id
+
+    invited_group = _first(
+        db.select(GroupInvitation.group_id, Group.created_by)
+        .join(Group, Group.id == GroupInvitation.group_id)
+        .group_by(GroupInvitation.group_id, Group.created_by)
+        .order_by(func.count().desc(), GroupInvitation.group_id),
+        'No invitations found'
+    )
+
+    open_group = _first(
+        db.select(Group.id, Group.created_by)
+        .where(Group.status == 'forming', Group.member_count < Group.cycle_size)
+        .order_by(Group.id),
+        'No forming group with a free slot'
+    )
+    joiner = _non_member(open_group.id)
+
+    restore_open_group = _restore_group(open_group.id, joiner)
+    invitation = {}
+
+    def invitation_setup():
+        invitation['code'] = code = secrets.token_urlsafe(12)
+        db.session.execute(db.insert(GroupInvitation).values(
+            group_id=open_group.id,
+            invited_by=open_group.created_by,
+            invitation_code=code,
+            status='pending',
+            expires_at=datetime.utcnow() + timedelta(hours=48),
+            created_at=datetime.utcnow(),
+        ))
+        db.session.commit()
+        return {'invitation_code': code}
+
+    def invitation_teardown():
+        restore_open_group()
+        db.session.execute(db.delete(GroupInvitation).where(GroupInvitation.invitation_code == invitation['code']))
+        db.session.commit()
+
+    return [
+        Scenario('dashboard.index', busiest_member),
+        Scenario('groups.view_group', busiest_member, {'group_id': largest_group}),
+        Scenario('groups.my_groups', busiest_member),
+        Scenario('groups.view_invitations', invited_group.created_by, {'group_id': invited_group.group_id}),
+        Scenario('groups.join_group', joiner, {'group_id': open_group.id}, method='POST',
+                 teardown=restore_open_group),
+        Scenario('groups.join_via_invitation', joiner, method='POST',
+                 setup=invitation_setup, teardown=invitation_teardown),
+    ]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_scenario(app, scenario, iterations=50, warmup=5):
+    """
+    Time a scenario through the test client
+
+    Each request gets its own app context, so the session and the
+    Flask-Login user are not shared between iterations.
+
+    Returns:
+        dict: Latency percentiles, SQL statement counts and status codes
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(scenario.user_id)
+        session['_fresh'] = True
+
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    latencies = []
+    statement_counts = []
+    status_codes = {}
+
+    for i in range(warmup + iterations):
+        with app.app_context():
+            url_values = dict(scenario.url_values)
+            if scenario.setup:
+                url_values.update(scenario.setup() or {})
+            with app.test_request_context():
+                url = url_for(scenario.endpoint, **url_values)
+
+        statements[0] = 0
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', count_statement)
+            try:
+                started = time.perf_counter()
+                response = client.open(url, method=scenario.method)
+                elapsed = time.perf_counter() - started
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        if scenario.teardown:
+            with app.app_context():
+                scenario.teardown()
+
+        if i < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        statement_counts.append(statements[0])
+        status_codes[str(response.status_code)] = status_codes.get(str(response.status_code), 0) + 1
+
+    result = {f'p{pct}_ms': round(percentile(latencies, pct), 3) for pct in PERCENTILES}
+    result.update({
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'max_ms': round(max(latencies), 3),
+        'sql_statements': int(statistics.median(statement_counts)),
+        'sql_statements_max': max(statement_counts),
+        'status_codes': status_codes,
+        'iterations': iterations,
+    })
+    return result
+
+
+def run_benchmarks(iterations=50, warmup=5, endpoints=None, progress=None):
+    """
+    Run every scenario and collect the results
+
+    Args:
+        iterations (int): Timed requests per endpoint
+        warmup (int): Untimed requests per endpoint before timing
+        endpoints (list): Only run these endpoints
+        progress (callable): Called with each endpoint's summary line
+
+    Returns:
+        dict: Run metadata and results keyed by endpoint
+    """
+    app = current_app._get_current_object()
+    scenarios = build_scenarios()
+    if endpoints:
+        scenarios = [scenario for scenario in scenarios if scenario.endpoint in endpoints]
+
+    # Forms are posted without a token, as the test config does
+    csrf_enabled = app.config.get('WTF_CSRF_ENABLED', True)
+    app.config['WTF_CSRF_ENABLED'] = False
+    results = {}
+    try:
+        for scenario in scenarios:
+            results[scenario.endpoint] = result = run_scenario(app, scenario, iterations, warmup)
+            if progress:
+                progress(f"{scenario.endpoint:<30} p50 {result['p50_ms']:8.2f}ms  "
+                         f"p95 {result['p95_ms']:8.2f}ms  sql {result['sql_statements']:3d}  "
+                         f"status {result['status_codes']}")
+    finally:
+        app.config['WTF_CSRF_ENABLED'] = csrf_enabled
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'database': db.engine.dialect.name,
+        'warmup': warmup,
+        'endpoints': results,
+    }
+
+
+def compare_results(baseline, current, threshold=0.2):
+    """
+    Compare a run against a baseline
+
+    Latency regresses when it grows by more than threshold (a fraction);
+    SQL statement counts regress on any increase.
+
+    Returns:
+        list: Regression messages, empty if nothing got worse
+    """
+    regressions = []
+    for endpoint, result in current['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            continue
+        for key, label in COMPARED_METRICS:
+            before, after = previous.get(key), result.get(key)
+            if before is None or after is None:
+                continue
+            if key == 'sql_statements':
+                regressed = after > before
+            else:
+                regressed = before > 0 and (after - before) / before > threshold
+            if regressed:
+                regressions.append(f'{endpoint}: {label} {before} -> {after}')
+    return regressions
+
+
+def save_results(results, path):
+    """Write results to a JSON file"""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """Read results from a JSON file"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _sqlite_join(connection, group_id, user_number):
+    """The writes of a join_group request: read the group, add a user and membership, bump the count"""
+    groups, users, memberships = Group.__table__, User.__table__, Membership.__table__
+    member_count = connection.execute(
+        select(groups.c.member_count).where(groups.c.id == group_id)
+    ).scalar_one()
+    user_id = connection.execute(insert(users).values(
+        username=f'bench{user_number}',
+        full_name=f'Bench User {user_number}',
+        email=f'bench{user_number}@example.com',
+        phone=f'+1{user_number:012d}',
+    )).inserted_primary_key[0]
+    connection.execute(insert(memberships).values(
+        user_id=user_id, group_id=group_id, payout_order=member_count + 1
+    ))
+    connection.execute(
+        update(groups).where(groups.c.id == group_id).values(member_count=member_count + 1)
+    )
+
+
+def _sqlite_roster(connection, group_id):
+    """The reads of a view_group request"""
+    memberships, users = Membership.__table__, User.__table__
+    connection.execute(
+        select(memberships, users.c.full_name)
+        .join(users, users.c.id == memberships.c.user_id)
+        .where(memberships.c.group_id == group_id)
+        .order_by(memberships.c.payout_order)
+    ).all()
+
+
+def _sqlite_seed(connection, groups, user_number):
+    """Create the owner of the benchmark groups and the groups themselves"""
+    owner_id = connection.execute(insert(User.__table__).values(
+        username=f'bench{user_number}',
+        full_name='Bench Owner',
+        email=f'bench{user_number}@example.com',
+        phone=f'+1{user_number:012d}',
+    )).inserted_primary_key[0]
+    connection.execute(insert(Group.__table__), [
+        {'name': f'Bench Group {i}', 'created_by': owner_id, 'cycle_size': 1000000, 'weekly_amount': 10}
+        for i in range(groups)
+    ])
+
+
+def _sqlite_worker(path, role, tuned, pragmas, seed, groups, seconds, barrier):
+    """
+    One benchmark process: repeat joins or roster reads for seconds once every process is ready
+
+    Returns:
+        dict: Operation and "database is locked" counts, and write latencies in ms
+    """
+    from app.sqlite_tuning import serialized_write, tune_engine
+
+    engine = create_engine(f'sqlite:///{path}')
+    if tuned:
+        tune_engine(engine, pragmas)
+
+    rng = random.Random(seed)
+    user_numbers = itertools.count(seed * 10000000)
+    result = {'operations': 0, 'errors': 0, 'latencies': []}
+
+    barrier.wait()
+    stop_at = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                if role == 'reader':
+                    with engine.connect() as connection:
+                        _sqlite_roster(connection, rng.randint(1, groups))
+                else:
+                    with serialized_write(force=True) if tuned else contextlib.nullcontext():
+                        with engine.begin() as connection:
+                            _sqlite_join(connection, rng.randint(1, groups), next(user_numbers))
+                    result['latencies'].append((time.perf_counter() - started) * 1000)
+                result['operations'] += 1
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                result['errors'] += 1
+    finally:
+        engine.dispose()
+    return result
+
+
+def run_sqlite_concurrency(tuned, writers=4, readers=8, seconds=5.0, groups=200, pragmas=None):
+    """
+    Measure concurrent read/write throughput on a scratch SQLite file
+
+    Each writer and reader is a separate process, like the workers of a
+    pre-forking server. Writers repeat the writes of a join_group request
+    and readers the roster query of view_group. With tuned set, every
+    process gets the high-concurrency PRAGMAs, and writers go through
+    serialized_write the way the group routes do.
+
+    Returns:
+        dict: Operations per second, "database is locked" errors and
+            write latency percentiles
+    """
+    from app.sqlite_tuning import sqlite_pragmas, tune_engine
+
+    pragmas = pragmas or sqlite_pragmas({})
+    directory = tempfile.mkdtemp(prefix='susu-sqlite-bench-')
+    path = os.path.join(directory, 'bench.db')
+    try:
+        engine = create_engine(f'sqlite:///{path}')
+        if tuned:
+            tune_engine(engine, pragmas)
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            _sqlite_seed(connection, groups, 1)
+        engine.dispose()
+
+        roles = ['writer'] * writers + ['reader'] * readers
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager, ProcessPoolExecutor(max_workers=len(roles), mp_context=context) as pool:
+            # Start the clock once every process has imported the app
+            barrier = manager.Barrier(len(roles))
+            futures = [
+                (role, pool.submit(_sqlite_worker, path, role, tuned, pragmas, seed, groups, seconds, barrier))
+                for seed, role in enumerate(roles, start=1)
+            ]
+            outcomes = [(role, future.result()) for role, future in futures]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def total(role, key):
+        return sum(outcome[key] for outcome_role, outcome in outcomes if outcome_role == role)
+
+    write_latencies = [latency for role, outcome in outcomes if role == 'writer' for latency in outcome['latencies']]
+    result = {
+        'tuned': tuned,
+        'writers': writers,
+        'readers': readers,
+        'seconds': seconds,
+        'reads_per_second': round(total('reader', 'operations') / seconds, 1),
+        'writes_per_second': round(total('writer', 'operations') / seconds, 1),
+        'read_errors': total('reader', 'errors'),
+        'write_errors': total('writer', 'errors'),
+    }
+    if write_latencies:
+        result.update({f'write_p{pct}_ms': round(percentile(write_latencies, pct), 3) for pct in (50, 95, 99)})
+    return result
@@ -0,0 +1,182 @@
+import click
+from app.extensions import db
+
+
+def register_commands(app):
+    """Register application-wide CLI commands"""
+
+    @app.cli.command('check-indexes')
+    def check_indexes():
+        """EXPLAIN the hot queries and fail if any scans a full table"""
+        from app.query_plans import check_hot_queries
+
+        results = check_hot_queries(db.engine)
+        failures = 0
+
+        for name, (plan, uses_index) in results.items():
+            click.echo(f"{'ok  ' if uses_index else 'SCAN'} {name}")
+            for line in plan:
+                click.echo(f'       {line}')
+            if not uses_index:
+                failures += 1
+
+        if failures:
+            click.echo(f'{failures} hot query(ies) not served by an index.')
+            raise SystemExit(1)
+
+    @app.cli.command('seed')
+    @click.option('--users', default=1000, show_default=True, help='Users to create.')
+    @click.option('--groups', default=100, show_default=True, help='Groups to create.')
+    @click.option('--weeks', default=52, show_default=True, help='Weeks of contribution history.')
+    @click.option('--max-group-size', default=12, show_default=True, help='Largest cycle size generated.')
+    @click.option('--batch-size', default=5000, show_default=True, help='Rows per batched insert.')
+    @click.option('--no-copy', is_flag=True, help='Use batched INSERTs even when COPY is available.')
+    @click.option('--random-seed', type=int, default=None, help='Seed for reproducible data.')
+    def seed(users, groups, weeks, max_group_size, batch_size, no_copy, random_seed):
+        """Load a synthetic dataset for load testing"""
+        from app.seed import seed_database
+
+        if users < 2 or groups < 0 or weeks < 1:
+            raise click.BadParameter('Need at least 2 users, 0 groups and 1 week')
+
+        result = seed_database(
+            users=users,
+            groups=groups,
+            weeks=weeks,
+            max_group_size=max_group_size,
+            batch_size=batch_size,
+            use_copy=not no_copy,
+            random_seed=random_seed,
+            progress=click.echo,
+        )
+
+        for table, count in result['rows'].items():
+            click.echo(f'  {table}: {count}')
+        method = f"COPY ({result['copy']})" if result['copy'] else 'batched INSERT'
+        click.echo(f"Seeded in {result['seconds']:.1f}s using {method}")
+
+    @app.cli.group('bench')
+    def bench():
+        """Benchmark the blueprint hot paths."""
+
+    @bench.command('run')
+    @click.option('--iterations', default=50, show_default=True, help='Timed requests per endpoint.')
+    @click.option('--warmup', default=5, show_default=True, help='Untimed requests per endpoint.')
+    @click.option('--endpoint', 'endpoints', multiple=True, help='Only run this endpoint (repeatable).')
+    @click.option('--output', type=click.Path(dir_okay=False), help='Save results as a JSON baseline.')
+    @click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False),
+                  help='Baseline to compare against.')
+    @click.option('--threshold', default=0.2, show_default=True, help='Allowed latency growth as a fraction.')
+    def bench_run(iterations, warmup, endpoints, output, baseline_path, threshold):
+        """Time each endpoint against the current database"""
+        from app.benchmarks import BenchmarkError, run_benchmarks, save_results, load_results
+
+        try:
+            results = run_benchmarks(iterations=iterations, warmup=warmup, endpoints=endpoints, progress=click.echo)
+        except BenchmarkError as e:
+            raise click.ClickException(str(e))
+
+        if output:
+            save_results(results, output)
+            click.echo(f'Saved results to {output}')
+
+        if baseline_path:
+            _report_regressions(load_results(baseline_path), results, threshold)
+
+    @bench.command('sqlite')
+    @click.option('--writers', default=4, show_default=True, help='Processes repeating join_group writes.')
+    @click.option('--readers', default=8, show_default=True, help='Processes repeating view_group reads.')
+    @click.option('--seconds', default=5.0, show_default=True, help='Duration of each run.')
+    def bench_sqlite(writers, readers, seconds):
+        """Compare concurrent SQLite throughput with and without high-concurrency mode"""
+        from flask import current_app
+        from app.benchmarks import run_sqlite_concurrency
+        from app.sqlite_tuning import sqlite_pragmas
+
+        pragmas = sqlite_pragmas(current_app.config)
+        for tuned in (False, True):
+            result = run_sqlite_concurrency(tuned, writers=writers, readers=readers, seconds=seconds, pragmas=pragmas)
+            click.echo(f"{'tuned  ' if tuned else 'default'}  reads/s {result['reads_per_second']:8.1f}  "
+                       f"writes/s {result['writes_per_second']:7.1f}  "
+                       f"write p95 {result.get('write_p95_ms', 0):8.2f}ms  "
+                       f"locked errors {result['read_errors'] + result['write_errors']}")
+
+    @bench.command('compare')
+    @click.argument('baseline_path', type=click.Path(exists=True, dir_okay=False))
+    @click.argument('results_path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--threshold', default=0.2, show_default=True, help='Allowed latency growth as a fraction.')
+    def bench_compare(baseline_path, results_path, threshold):
+        """Compare two saved benchmark runs"""
+        from app.benchmarks import load_results
+
+        _report_regressions(load_results(baseline_path), load_results(results_path), threshold)
+
+    @app.cli.group('cycles')
+    def cycles():
+        """Settle group contribution cycles."""
+
+    @cycles.command('settle')
+    @click.option('--batch-size', default=1000, show_default=True, help='Groups settled per transaction.')
+    @click.option('--limit', type=int, default=None, help='Stop after this many collecting or disbursing groups.')
+    @click.option('--quiet', is_flag=True, help='Only print the summary.')
+    def cycles_settle(batch_size, limit, quiet):
+        """Pay out every fully paid group and move it to its next cycle"""
+        from app.groups.settlement import settle_due_groups
+
+        if batch_size < 1:
+            raise click.BadParameter('--batch-size must be at least 1')
+
+        totals = settle_due_groups(batch_size=batch_size, limit=limit, progress=None if quiet else click.echo)
+        click.echo(f"Checked {totals['checked']} groups in {totals['batches']} batch(es) "
+                   f"in {totals['seconds']:.1f}s: {totals['advanced']} advanced, "
+                   f"{totals['completed']} completed, {totals['payouts']} payouts written, "
+                   f"{totals['conflicts']} left for the next run")
+
+    @cycles.command('run')
+    @click.option('--workers', default=4, show_default=True, help='Worker processes.')
+    @click.option('--partitions', type=int, default=None, help='Partitions of the groups (default: --workers).')
+    @click.option('--batch-size', default=1000, show_default=True, help='Groups settled per transaction.')
+    @click.option('--resume', 'run_id', default=None, help='Continue this run from its checkpoints.')
+    def cycles_run(workers, partitions, batch_size, run_id):
+        """Settle every fully paid group across a pool of worker processes"""
+        import os
+        from app.groups.cycle_runner import CycleRunError, run_partitioned
+
+        if workers < 1 or batch_size < 1 or (partitions is not None and partitions < 1):
+            raise click.BadParameter('--workers, --partitions and --batch-size must be at least 1')
+
+        try:
+            result = run_partitioned(
+                workers=workers,
+                partitions=partitions,
+                batch_size=batch_size,
+                run_id=run_id,
+                config_name=os.getenv('FLASK_ENV', 'development'),
+                progress=click.echo,
+            )
+        except CycleRunError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"Run {result['run_id']}: checked {result['checked']} groups in {result['partitions']} "
+                   f"partition(s) in {result['seconds']:.1f}s: {result['advanced']} advanced, "
+                   f"{result['completed']} completed, {result['payouts']} payouts written, "
+                   f"{result['conflicts']} left for the next run")
+        for failure in result['failures']:
+            click.echo(f"FAILED partition {failure['partition']} after group {failure['last_id']}: {failure['error']}")
+        if result['failures']:
+            click.echo(f"Resume with: flask cycles run --resume {result['run_id']}")
+            raise SystemExit(1)
+
+
+def _report_regressions(baseline, results, threshold):
+    """Print regressions against a baseline and exit non-zero if there are any"""
+    from app.benchmarks import compare_results
+
+    regressions = compare_results(baseline, results, threshold)
+    for regression in regressions:
+        click.echo(f'REGRESSION {regression}')
+
+    if regressions:
+        click.echo(f'{len(regressions)} regression(s) above {threshold:.0%}.')
+        raise SystemExit(1)
+    click.echo('No regressions.')
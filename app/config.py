@@ -11,11 +11,70 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-development-only'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Read replicas for the read-only views (comma-separated URLs) and how long a
+    # user's reads stay on the primary after they write
+    DATABASE_REPLICA_URLS = [url.strip() for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS') or 5)
+    
+    # SQLite high-concurrency mode: WAL and tuned PRAGMAs on connect, and
+    # serialized writes in the group routes (for SQLite deployments)
+    SQLITE_HIGH_CONCURRENCY = os.environ.get('SQLITE_HIGH_CONCURRENCY', 'false').lower() in ['true', 'on', '1']
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456)
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -64000)
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE') or 'MEMORY'
+    
     # Supabase configuration
     SUPABASE_URL = os.environ.get('SUPABASE_URL')
     SUPABASE_ANON_KEY = os.environ.get('SUPABASE_ANON_KEY')
     SUPABASE_SERVICE_ROLE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
     
+    # Supabase HTTP connection pool (shared per process)
+    SUPABASE_HTTP_TIMEOUT = float(os.environ.get('SUPABASE_HTTP_TIMEOUT') or 10)
+    SUPABASE_CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT') or 5)
+    SUPABASE_POOL_MAX_CONNECTIONS = int(os.environ.get('SUPABASE_POOL_MAX_CONNECTIONS') or 20)
+    SUPABASE_POOL_MAX_KEEPALIVE = int(os.environ.get('SUPABASE_POOL_MAX_KEEPALIVE') or 10)
+    SUPABASE_POOL_KEEPALIVE_EXPIRY = float(os.environ.get('SUPABASE_POOL_KEEPALIVE_EXPIRY') or 30)
+    
+    # Local JWT verification (falls back to Supabase when neither is set)
+    SUPABASE_JWT_SECRET = os.environ.get('SUPABASE_JWT_SECRET')
+    SUPABASE_JWKS_URL = os.environ.get('SUPABASE_JWKS_URL')
+    SUPABASE_JWT_AUDIENCE = os.environ.get('SUPABASE_JWT_AUDIENCE') or 'authenticated'
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE') or 10000)
+    TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL') or 300)
+    
+    # Per-process cache of the logged-in user loaded by Flask-Login
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 10000)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 60)
+    
+    # Admin access to operational endpoints (/metrics and debug views)
+    ADMIN_EMAILS = {email.strip().lower() for email in (os.environ.get('ADMIN_EMAILS') or '').split(',') if email.strip()}
+    ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN')
+    
+    # Per-request instrumentation served at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    
+    # Request profiling; profiles are written to PROFILE_DIR (default instance/profiles)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
+    PROFILE_MODE = os.environ.get('PROFILE_MODE') or 'sample'
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS') or 2)
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES') or 500)
+    
+    # Slow query log (statements slower than this are logged and EXPLAINed; 0 disables)
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 250)
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() in ['true', 'on', '1']
+    SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE') or 100)
+    
+    # Contribution callbacks (POST /payments/contributions); disabled while the token is unset
+    PAYMENTS_API_TOKEN = os.environ.get('PAYMENTS_API_TOKEN')
+    CONTRIBUTION_BATCH_SIZE = int(os.environ.get('CONTRIBUTION_BATCH_SIZE') or 500)
+    CONTRIBUTION_BATCH_WAIT_MS = float(os.environ.get('CONTRIBUTION_BATCH_WAIT_MS') or 10)
+    
+    # Per-partition checkpoints of `flask cycles run` (default instance/cycle-runs)
+    CYCLE_CHECKPOINT_DIR = os.environ.get('CYCLE_CHECKPOINT_DIR')
+    
     # Flask-Mail configuration (for future use)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -42,6 +101,9 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///susu_test.db'
     WTF_CSRF_ENABLED = False
+    
+    # Raise on lazy loads so N+1 query regressions fail the test suite
+    SQLALCHEMY_STRICT_LOADING = True
 
 
 class ProductionConfig(Config):
@@ -50,6 +112,18 @@ class ProductionConfig(Config):
     """
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     
+    # Connection pool, applied to the primary and any replicas
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1'],
+    }
+    
+    # Connections opened per pool at startup
+    DB_POOL_WARMUP = int(os.environ.get('DB_POOL_WARMUP') or 2)
+    
     # Ensure production has a valid secret key
     @classmethod
     def init_app(cls, app):
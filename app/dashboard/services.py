@@ -0,0 +1,85 @@
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Group, Membership, Transaction
+
+
+def get_recent_transactions(user_id, limit=10):
+    """Get the user's most recent transactions across all of their groups"""
+    return (
+        Transaction.query
+        .join(Membership, Transaction.membership_id == Membership.id)
+        .filter(Membership.user_id == user_id)
+        .order_by(Transaction.timestamp.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def get_group_summaries(user_id):
+    """
+    Load every group the user belongs to together with the user's total
+    contributions, in a single aggregated query.
+
+    Returns:
+        list: (membership, group, contribution_total) tuples
+    """
+    # Only this user's transactions are aggregated, through the
+    # memberships.user_id and transactions.membership_id indexes
+    contribution_totals = (
+        db.session.query(
+            Transaction.membership_id.label('membership_id'),
+            func.sum(Transaction.amount).label('contribution_total')
+        )
+        .join(Membership, Transaction.membership_id == Membership.id)
+        .filter(Membership.user_id == user_id, Transaction.tx_type == 'contribution')
+        .group_by(Transaction.membership_id)
+        .subquery()
+    )
+
+    return (
+        db.session.query(
+            Membership,
+            Group,
+            func.coalesce(contribution_totals.c.contribution_total, 0)
+        )
+        .join(Group, Membership.group_id == Group.id)
+        .outerjoin(contribution_totals, contribution_totals.c.membership_id == Membership.id)
+        .filter(Membership.user_id == user_id)
+        .order_by(Membership.id)
+        .all()
+    )
+
+
+def build_dashboard(user_id):
+    """
+    Build all data needed by the dashboard view.
+
+    Issues a fixed number of queries regardless of how many groups
+    the user has joined.
+    """
+    user_groups = []
+    total_savings = 0
+
+    for membership, group, contribution_total in get_group_summaries(user_id):
+        total_savings += float(contribution_total)
+
+        # Format group data for template
+        user_groups.append({
+            'id': group.id,
+            'name': group.name,
+            'description': group.description or '',
+            'status': group.status,
+            'contribution_amount': float(group.weekly_amount),
+            'frequency': 'weekly',  # Hardcoded for now
+            'member_count': group.member_count,
+            'user_position': membership.payout_order,
+            'current_cycle': group.current_cycle,
+            'total_cycles': group.cycle_size,
+            'next_payment_date': '2023-08-15'  # Placeholder - would be calculated in real app
+        })
+
+    return {
+        'user_groups': user_groups,
+        'total_savings': total_savings,
+        'transactions': get_recent_transactions(user_id)
+    }
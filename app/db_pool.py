@@ -0,0 +1,161 @@
+"""
+Database connection pool telemetry
+Times how long requests wait to check out a connection and counts
+overflow connections and checkout timeouts, so a traffic burst shows
+whether the pool is the bottleneck. Pool state is exported with the
+other metrics at /metrics and as JSON at /admin/db-pool.
+"""
+
+import os
+import time
+import weakref
+from flask import has_app_context
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool
+from app.extensions import db
+from app.metrics import registry, Counter, Gauge, Histogram
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Engines to dispose in forked children
+_engines = weakref.WeakSet()
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, overflow connections and timeouts"""
+
+    telemetry_name = 'primary'
+
+    def connect(self):
+        started = time.perf_counter()
+        overflow = self.overflow()
+        try:
+            connection = super().connect()
+            if self.overflow() > max(overflow, 0):
+                pool_overflow_connections.inc(pool=self.telemetry_name)
+            return connection
+        except sa_exc.TimeoutError:
+            pool_timeouts.inc(pool=self.telemetry_name)
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - started, pool=self.telemetry_name)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry_name = self.telemetry_name
+        return pool
+
+
+def _pools():
+    """Get (name, pool) for every engine of the current app that uses a QueuePool"""
+    if not has_app_context():
+        return []
+    return [
+        (key or 'primary', engine.pool)
+        for key, engine in db.engines.items()
+        if isinstance(engine.pool, QueuePool)
+    ]
+
+
+def pool_status():
+    """
+    Get the current state of each connection pool
+
+    Returns:
+        dict: Mapping of pool name to size, checked-in, checked-out and overflow counts
+    """
+    return {
+        name: {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'timeout_seconds': pool.timeout(),
+        }
+        for name, pool in _pools()
+    }
+
+
+def _gauge(field):
+    def read():
+        for name, status in pool_status().items():
+            yield (name,), status[field]
+    return read
+
+
+pool_checkout_wait = registry.register(Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting to check out a database connection', ('pool',), WAIT_BUCKETS))
+pool_timeouts = registry.register(Counter(
+    'db_pool_timeouts_total', 'Checkouts that gave up after pool_timeout', ('pool',)))
+pool_overflow_connections = registry.register(Counter(
+    'db_pool_overflow_connections_total', 'Connections opened beyond pool_size', ('pool',)))
+registry.register(Gauge(
+    'db_pool_size', 'Configured number of pooled connections', ('pool',), _gauge('size')))
+registry.register(Gauge(
+    'db_pool_checked_out', 'Connections currently in use', ('pool',), _gauge('checked_out')))
+registry.register(Gauge(
+    'db_pool_overflow', 'Overflow connections currently open', ('pool',), _gauge('overflow')))
+
+
+def configure_pool(app):
+    """
+    Use TimedQueuePool for engines configured with a pool_size
+
+    Must run before db.init_app so the engines are created with it.
+    """
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'pool_size' in options and 'poolclass' not in options:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(options, poolclass=TimedQueuePool)
+
+
+def warm_up_pool(engine, count):
+    """
+    Open count connections and return them to the pool
+
+    Returns:
+        int: Number of connections opened
+    """
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    except Exception as e:
+        logger.warning(f"Pool warm-up stopped after {len(connections)} connection(s): {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def _dispose_after_fork():
+    """Drop inherited pooled connections in a forked child without closing the parent's sockets"""
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+# Pre-fork servers (gunicorn --preload, uwsgi) must not share warmed connections with the parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+def init_pool_telemetry(app):
+    """
+    Name the app's pools and warm them up to DB_POOL_WARMUP connections
+
+    When a pre-forking server loads the app before forking (gunicorn
+    --preload), each worker disposes the engines right after the fork,
+    so warmed connections are not shared between processes.
+    """
+    warmup = app.config.get('DB_POOL_WARMUP', 0)
+    with app.app_context():
+        for key, engine in db.engines.items():
+            _engines.add(engine)
+            if not isinstance(engine.pool, TimedQueuePool):
+                continue
+            engine.pool.telemetry_name = key or 'primary'
+            if warmup:
+                opened = warm_up_pool(engine, min(warmup, engine.pool.size()))
+                logger.info(f"Warmed up {opened} connection(s) for pool {engine.pool.telemetry_name}")
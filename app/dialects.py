@@ -0,0 +1,25 @@
+"""
+Dialect helpers
+Gives access to ON CONFLICT inserts, which SQLite and PostgreSQL both
+support but only through their dialect-specific insert constructs.
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+
+
+def conflict_insert(model):
+    """
+    Get an INSERT for the model that supports on_conflict_do_nothing/update
+
+    Raises:
+        NotImplementedError: If the database isn't SQLite or PostgreSQL
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+
+    raise NotImplementedError(f'ON CONFLICT inserts are not supported on {dialect}')
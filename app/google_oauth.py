@@ -9,6 +9,7 @@ from google_auth_oauthlib.flow import Flow
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from flask import current_app, url_for, request, session
+from app.metrics import track_upstream
 import logging
 
 logger = logging.getLogger(__name__)
@@ -91,13 +92,15 @@ class GoogleOAuthService:
             flow.redirect_uri = self.redirect_uri
             
             # Exchange code for tokens
-            flow.fetch_token(code=authorization_code)
+            with track_upstream('google', 'fetch_token'):
+                flow.fetch_token(code=authorization_code)
             
             # Get user info from Google
-            user_info_response = requests.get(
-                self.userinfo_url,
-                headers={'Authorization': f'Bearer {flow.credentials.token}'}
-            )
+            with track_upstream('google', 'userinfo'):
+                user_info_response = requests.get(
+                    self.userinfo_url,
+                    headers={'Authorization': f'Bearer {flow.credentials.token}'}
+                )
             
             if user_info_response.status_code == 200:
                 user_info = user_info_response.json()
@@ -114,11 +117,12 @@ class GoogleOAuthService:
     def verify_id_token(self, id_token_string):
         """Verify Google ID token"""
         try:
-            idinfo = id_token.verify_oauth2_token(
-                id_token_string, 
-                google_requests.Request(), 
-                self.client_id
-            )
+            with track_upstream('google', 'verify_id_token'):
+                idinfo = id_token.verify_oauth2_token(
+                    id_token_string, 
+                    google_requests.Request(), 
+                    self.client_id
+                )
             
             # ID token is valid
             logger.info(f"Verified ID token for user: {idinfo.get('email')}")
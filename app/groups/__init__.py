@@ -1 +1,2 @@
-from app.groups.routes import groups_bp
\ No newline at end of file
+from app.groups.routes import groups_bp
+from app.groups import commands
\ No newline at end of file
@@ -0,0 +1,86 @@
+import time
+import click
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Group, Membership
+from app.groups.routes import groups_bp
+from app.groups.invitations import expire_stale_invitations, purge_old_invitations
+
+
+def find_member_count_mismatches():
+    """
+    Find groups whose stored member_count differs from their memberships
+
+    Returns:
+        list: (group_id, stored_count, actual_count) tuples
+    """
+    actual_counts = (
+        db.session.query(
+            Membership.group_id.label('group_id'),
+            func.count(Membership.id).label('actual_count')
+        )
+        .group_by(Membership.group_id)
+        .subquery()
+    )
+    actual_count = func.coalesce(actual_counts.c.actual_count, 0)
+
+    return (
+        db.session.query(Group.id, Group.member_count, actual_count)
+        .outerjoin(actual_counts, actual_counts.c.group_id == Group.id)
+        .filter(Group.member_count != actual_count)
+        .order_by(Group.id)
+        .all()
+    )
+
+
+@groups_bp.cli.command('check-member-counts')
+@click.option('--fix', is_flag=True, help='Rewrite mismatched counters from the memberships table.')
+def check_member_counts(fix):
+    """Verify Group.member_count against the memberships table"""
+    mismatches = find_member_count_mismatches()
+
+    if not mismatches:
+        click.echo('All group member counts are consistent.')
+        return
+
+    for group_id, stored_count, actual_count in mismatches:
+        click.echo(f'Group {group_id}: stored {stored_count}, actual {actual_count}')
+
+    if fix:
+        actual_count = (
+            db.select(func.count(Membership.id))
+            .where(Membership.group_id == Group.id)
+            .scalar_subquery()
+        )
+        Group.query.filter(Group.id.in_([row[0] for row in mismatches])).update(
+            {Group.member_count: actual_count}, synchronize_session=False
+        )
+        db.session.commit()
+        click.echo(f'Fixed {len(mismatches)} group(s).')
+    else:
+        click.echo(f'{len(mismatches)} group(s) inconsistent. Re-run with --fix to repair.')
+        raise SystemExit(1)
+
+
+@groups_bp.cli.command('sweep-invitations')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows updated per statement.')
+@click.option('--purge-after-days', type=int, default=None,
+              help='Also delete cancelled/expired invitations that expired more than this many days ago.')
+@click.option('--interval', type=int, default=None,
+              help='Keep running, sweeping every INTERVAL seconds.')
+def sweep_invitations(batch_size, purge_after_days, interval):
+    """Mark expired pending invitations and optionally purge old ones"""
+    while True:
+        started = time.monotonic()
+        expired = expire_stale_invitations(batch_size=batch_size)
+        purged = 0
+        if purge_after_days is not None:
+            purged = purge_old_invitations(purge_after_days, batch_size=batch_size)
+
+        elapsed = time.monotonic() - started
+        click.echo(f'Expired {expired} invitation(s), purged {purged} in {elapsed:.2f}s.')
+
+        if interval is None:
+            return
+        time.sleep(interval)
+
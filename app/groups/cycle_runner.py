@@ -0,0 +1,208 @@
+"""
+Parallel cycle settlement
+Splits the collecting and disbursing groups into partitions by Group.id
+modulo the partition count and settles each partition in its own worker
+process, with its own app and database engine. After every committed batch a
+worker writes its partition's checkpoint (last group id, counts) under
+CYCLE_CHECKPOINT_DIR/<run id>, so a run that crashed or failed can be
+resumed with the same run id and each partition continues after its last
+committed batch. Re-settling a batch whose checkpoint was lost is
+harmless: its groups were advanced and their paid flags reset, so they
+are no longer due.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+from flask import current_app
+from app.extensions import db
+from app.groups.settlement import SETTLEMENT_COUNTS, due_group_ids, settle_groups
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CycleRunError(Exception):
+    """Raised when a run can't be started or resumed as requested"""
+
+
+def checkpoint_dir(app=None):
+    app = app or current_app
+    return app.config.get('CYCLE_CHECKPOINT_DIR') or os.path.join(app.instance_path, 'cycle-runs')
+
+
+def _write_json(path, data):
+    """Write a file atomically so a crash never leaves half a checkpoint"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _checkpoint_path(run_dir, index):
+    return os.path.join(run_dir, f'partition-{index}.json')
+
+
+def load_checkpoint(run_dir, index):
+    """Get a partition's saved state, or a fresh one if it hasn't started"""
+    try:
+        with open(_checkpoint_path(run_dir, index)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict({key: 0 for key in SETTLEMENT_COUNTS}, partition=index, last_id=0, batches=0, done=False, error=None)
+
+
+def _settle_partition(config_name, run_dir, index, count, batch_size, messages):
+    """
+    Worker process: settle one partition from its checkpoint to the end
+
+    A failed batch is rolled back and stops the partition with the error
+    recorded in its checkpoint, so resuming the run retries that batch.
+
+    Returns:
+        dict: The partition's final checkpoint
+    """
+    from app import create_app
+    from app.sqlite_tuning import serialized_write
+
+    app = create_app(config_name)
+    state = load_checkpoint(run_dir, index)
+    state['error'] = None
+
+    with app.app_context():
+        try:
+            while True:
+                group_ids = due_group_ids(state['last_id'], batch_size, partition=(index, count))
+                # End the read so the batch's writes start a fresh transaction
+                db.session.rollback()
+                if not group_ids:
+                    state['done'] = True
+                    break
+
+                # Takes the write lock up front in SQLite high-concurrency mode
+                with serialized_write():
+                    result = settle_groups(group_ids)
+                    db.session.commit()
+
+                for key in SETTLEMENT_COUNTS:
+                    state[key] += result[key]
+                state['batches'] += 1
+                state['last_id'] = group_ids[-1]
+                _write_json(_checkpoint_path(run_dir, index), state)
+                messages.put(f"partition {index}: groups through {state['last_id']}, "
+                             f"{result['advanced']} advanced, {result['completed']} completed")
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"Partition {index} failed after group {state['last_id']}")
+            state['error'] = f'{type(e).__name__}: {e}'
+        finally:
+            _write_json(_checkpoint_path(run_dir, index), state)
+            for engine in db.engines.values():
+                engine.dispose()
+    return state
+
+
+def run_partitioned(workers=4, partitions=None, batch_size=1000, run_id=None, config_name='development', progress=None):
+    """
+    Settle every due group across a pool of worker processes
+
+    Args:
+        workers (int): Worker processes
+        partitions (int): Partitions to split the groups into; defaults to
+            workers. More partitions than workers gives finer checkpoints
+            and evens out uneven partitions
+        batch_size (int): Groups settled per transaction
+        run_id (str): Resume this run; a new run id is generated if omitted
+        config_name (str): App config the workers are created with
+        progress (callable): Called with status lines while workers run
+
+    Returns:
+        dict: Run id, totals of settle_groups' counts, per-partition
+            failures, whether every partition finished, and seconds
+
+    Raises:
+        CycleRunError: If run_id doesn't exist or used another partition
+            count, or a new run's id is taken
+    """
+    started = time.perf_counter()
+    resuming = run_id is not None
+    run_id = run_id or datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    run_dir = os.path.join(checkpoint_dir(), run_id)
+    manifest_path = os.path.join(run_dir, 'run.json')
+
+    if resuming:
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise CycleRunError(f'No cycle run {run_id} in {checkpoint_dir()}')
+        if partitions and partitions != manifest['partitions']:
+            raise CycleRunError(f"Run {run_id} used {manifest['partitions']} partitions, not {partitions}")
+        partitions = manifest['partitions']
+    else:
+        partitions = partitions or workers
+        try:
+            os.makedirs(run_dir)
+        except FileExistsError:
+            raise CycleRunError(f'Cycle run {run_id} already exists; resume it or wait a second')
+        _write_json(manifest_path, {
+            'partitions': partitions,
+            'batch_size': batch_size,
+            'started_at': datetime.utcnow().isoformat(),
+        })
+
+    states = {index: load_checkpoint(run_dir, index) for index in range(partitions)}
+    todo = [index for index, state in states.items() if not state['done']]
+    if progress:
+        progress(f"Run {run_id}: {len(todo)} of {partitions} partition(s) to settle with {min(workers, len(todo) or 1)} worker(s)")
+
+    if todo:
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager, ProcessPoolExecutor(max_workers=min(workers, len(todo)), mp_context=context) as pool:
+            messages = manager.Queue()
+            futures = {
+                pool.submit(_settle_partition, config_name, run_dir, index, partitions, batch_size, messages): index
+                for index in todo
+            }
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.5)
+                while True:
+                    try:
+                        message = messages.get_nowait()
+                    except queue.Empty:
+                        break
+                    if progress:
+                        progress(message)
+                for future in finished:
+                    index = futures[future]
+                    try:
+                        states[index] = future.result()
+                    except Exception as e:
+                        # The worker process died; its checkpoint has the last committed batch
+                        states[index] = dict(load_checkpoint(run_dir, index), error=f'{type(e).__name__}: {e}')
+                    if progress:
+                        outcome = 'failed' if states[index]['error'] else 'done'
+                        progress(f"partition {index} {outcome} after {states[index]['batches']} batch(es)")
+
+    totals = {key: sum(state[key] for state in states.values()) for key in SETTLEMENT_COUNTS}
+    failures = [
+        {'partition': index, 'last_id': state['last_id'], 'error': state['error']}
+        for index, state in sorted(states.items()) if state['error'] or not state['done']
+    ]
+    for failure in failures:
+        logger.error(f"Cycle run {run_id} partition {failure['partition']} stopped after group "
+                     f"{failure['last_id']}: {failure['error']}")
+
+    return dict(
+        totals,
+        run_id=run_id,
+        partitions=partitions,
+        failures=failures,
+        complete=not failures,
+        seconds=time.perf_counter() - started,
+    )
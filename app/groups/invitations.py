@@ -0,0 +1,241 @@
+"""
+Invitation services
+Creates many GroupInvitation rows in one transaction with a single
+batched INSERT, relying on the unique constraint on invitation_code
+instead of checking each generated code beforehand, and sweeps expired
+invitations in batches.
+"""
+
+import csv
+import io
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import GroupInvitation
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on contacts accepted in one request
+MAX_BULK_INVITATIONS = 200
+
+CONTACT_FIELDS = ('invited_name', 'invited_email', 'invited_phone')
+_FIELD_LENGTHS = {field: GroupInvitation.__table__.c[field].type.length for field in CONTACT_FIELDS}
+
+_HEADER_ALIASES = {
+    'name': 'invited_name',
+    'full_name': 'invited_name',
+    'invited_name': 'invited_name',
+    'email': 'invited_email',
+    'invited_email': 'invited_email',
+    'phone': 'invited_phone',
+    'phone_number': 'invited_phone',
+    'invited_phone': 'invited_phone',
+}
+
+_PHONE_PATTERN = re.compile(r'^\+?[0-9][0-9 \-]{5,}$')
+
+
+class BulkInvitationError(Exception):
+    """Raised when a bulk invitation request can't be processed"""
+
+
+def parse_contacts_csv(text):
+    """
+    Parse contacts from CSV text
+
+    A header row with name/email/phone columns is used when present;
+    otherwise each value is classified as an email, phone number or name.
+
+    Returns:
+        list: Contact dicts with invited_name, invited_email and invited_phone
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+
+    header = [_HEADER_ALIASES.get(cell.strip().lower()) for cell in rows[0]]
+    if any(header):
+        return [
+            {field: row[i].strip() for i, field in enumerate(header) if field and i < len(row)}
+            for row in rows[1:]
+        ]
+
+    contacts = []
+    for row in rows:
+        contact = {}
+        for cell in (cell.strip() for cell in row):
+            if not cell:
+                continue
+            if '@' in cell:
+                contact.setdefault('invited_email', cell)
+            elif _PHONE_PATTERN.match(cell):
+                contact.setdefault('invited_phone', cell)
+            else:
+                contact.setdefault('invited_name', cell)
+        contacts.append(contact)
+    return contacts
+
+
+def normalize_contacts(contacts):
+    """
+    Clean contact dicts and split out the ones that can't be invited
+
+    Returns:
+        tuple: (valid contacts, list of error messages)
+    """
+    if not isinstance(contacts, list):
+        return [], ['Contacts must be a list']
+
+    valid = []
+    errors = []
+    seen = set()
+
+    for index, contact in enumerate(contacts, start=1):
+        if not isinstance(contact, dict):
+            errors.append(f'Contact {index}: must be an object with name, email or phone')
+            continue
+
+        cleaned = {
+            field: (str(contact.get(field) or contact.get(field.replace('invited_', '')) or '').strip() or None)
+            for field in CONTACT_FIELDS
+        }
+        if cleaned['invited_email']:
+            cleaned['invited_email'] = cleaned['invited_email'].lower()
+
+        if not cleaned['invited_email'] and not cleaned['invited_phone']:
+            errors.append(f'Contact {index}: an email or phone number is required')
+            continue
+
+        too_long = [
+            field.replace('invited_', '') for field in CONTACT_FIELDS
+            if cleaned[field] and len(cleaned[field]) > _FIELD_LENGTHS[field]
+        ]
+        if too_long:
+            errors.append(f"Contact {index}: {', '.join(too_long)} too long")
+            continue
+
+        key = (cleaned['invited_email'], cleaned['invited_phone'])
+        if key in seen:
+            errors.append(f'Contact {index}: duplicate of an earlier contact')
+            continue
+        seen.add(key)
+        valid.append(cleaned)
+
+    return valid, errors
+
+
+def create_invitations_bulk(group, invited_by, contacts, expires_in_hours=48, max_attempts=3):
+    """
+    Create invitations for many contacts in one transaction
+
+    Codes are generated for the whole batch at once and inserted with a
+    single executemany. If a code collides with an existing one, the
+    transaction is rolled back and retried with fresh codes; any other
+    integrity error is raised.
+
+    Args:
+        group (Group): The group to invite to
+        invited_by (int): ID of the inviting user
+        contacts (list): Contact dicts (see normalize_contacts)
+
+    Returns:
+        list: The inserted rows as dicts, including invitation_code
+    """
+    if not contacts:
+        return []
+    if len(contacts) > MAX_BULK_INVITATIONS:
+        raise BulkInvitationError(f'At most {MAX_BULK_INVITATIONS} invitations can be sent at once')
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(hours=expires_in_hours)
+
+    for attempt in range(max_attempts):
+        codes = GroupInvitation.generate_invitation_codes(len(contacts))
+        rows = [
+            {
+                'group_id': group.id,
+                'invited_by': invited_by,
+                'invitation_code': code,
+                'status': 'pending',
+                'expires_at': expires_at,
+                'created_at': now,
+                **contact
+            }
+            for code, contact in zip(codes, contacts)
+        ]
+
+        try:
+            db.session.execute(insert(GroupInvitation), rows)
+            db.session.commit()
+            return rows
+        except IntegrityError as e:
+            db.session.rollback()
+            # Only a clash on the unique invitation_code is worth retrying with fresh codes
+            if 'invitation_code' not in str(e.orig):
+                raise
+            logger.warning(f"Invitation code collision on attempt {attempt + 1}, regenerating batch")
+
+    raise BulkInvitationError('Could not generate unique invitation codes, please try again')
+
+
+def expire_stale_invitations(batch_size=1000, now=None):
+    """
+    Mark pending invitations past their expiry as expired
+
+    Runs one indexed UPDATE per batch and commits between batches so
+    locks are held briefly.
+
+    Returns:
+        int: Number of invitations marked expired
+    """
+    now = now or datetime.utcnow()
+    stale_ids = (
+        db.select(GroupInvitation.id)
+        .where(GroupInvitation.status == 'pending', GroupInvitation.expires_at < now)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+
+    total = 0
+    while True:
+        result = db.session.execute(
+            db.update(GroupInvitation)
+            .where(GroupInvitation.id.in_(stale_ids))
+            .values(status='expired')
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def purge_old_invitations(retention_days, batch_size=1000, now=None):
+    """
+    Delete cancelled and expired invitations that expired before the retention window
+
+    Returns:
+        int: Number of invitations deleted
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    old_ids = (
+        db.select(GroupInvitation.id)
+        .where(GroupInvitation.status.in_(('cancelled', 'expired')), GroupInvitation.expires_at < cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+
+    total = 0
+    while True:
+        result = db.session.execute(
+            db.delete(GroupInvitation)
+            .where(GroupInvitation.id.in_(old_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
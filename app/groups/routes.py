@@ -1,9 +1,15 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.models import Group, Membership, GroupInvitation, User
 from app.groups.forms import CreateGroupForm
 from app.groups.fsm import GroupStateMachine
+from app.groups.slots import AlreadyMember, SlotUnavailable, release_slot, reserve_slot
+from app.sqlite_tuning import serialize_writes
+from app.groups.invitations import (
+    BulkInvitationError, create_invitations_bulk, normalize_contacts, parse_contacts_csv
+)
 
 # Create blueprint
 groups_bp = Blueprint('groups', __name__, url_prefix='/groups')
@@ -11,6 +17,7 @@ groups_bp = Blueprint('groups', __name__, url_prefix='/groups')
 
 @groups_bp.route('/create', methods=['GET', 'POST'])
 @login_required
+@serialize_writes(methods=('POST',))
 def create_group():
     """Create a new Susu group"""
     form = CreateGroupForm()
@@ -34,6 +41,7 @@ def create_group():
         )
         
         db.session.add(membership)
+        group.adjust_member_count(1)
         db.session.commit()
         
         flash(f'Group "{group.name}" created successfully!', 'success')
@@ -44,6 +52,7 @@ def create_group():
 
 @groups_bp.route('/join/<int:group_id>', methods=['GET', 'POST'])
 @login_required
+@serialize_writes
 def join_group(group_id):
     """Join an existing Susu group"""
     group = Group.query.get_or_404(group_id)
@@ -68,23 +77,21 @@ def join_group(group_id):
         flash('This group is already full.', 'error')
         return redirect(url_for('dashboard.index'))
     
-    # Add user to group
-    next_position = group.memberships.count() + 1
-    membership = Membership(
-        user_id=current_user.id,
-        group_id=group.id,
-        payout_order=next_position
-    )
-    
-    db.session.add(membership)
-    db.session.commit()
+    # Claim a payout slot; this also starts the group if it filled it
+    try:
+        payout_order, started = reserve_slot(group.id, current_user.id)
+        db.session.commit()
+    except AlreadyMember as e:
+        flash(str(e), 'info')
+        return redirect(url_for('dashboard.index'))
+    except SlotUnavailable as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+        return redirect(url_for('dashboard.index'))
     
     flash(f'You have successfully joined {group.name}!', 'success')
     
-    # Check if group is now full and can start
-    if GroupStateMachine.can_start(group.status, group.memberships.count(), group.cycle_size):
-        group.status = 'collecting'
-        db.session.commit()
+    if started:
         flash(f'Group {group.name} is now complete and has started collecting contributions!', 'info')
     
     return redirect(url_for('dashboard.index'))
@@ -96,19 +103,22 @@ def view_group(group_id):
     """View details of a specific group"""
     group = Group.query.get_or_404(group_id)
     
+    # Get all members with their users in a single query
+    memberships = (
+        Membership.query
+        .options(joinedload(Membership.user))
+        .filter_by(group_id=group.id)
+        .order_by(Membership.payout_order)
+        .all()
+    )
+    
     # Check if user is a member
-    membership = Membership.query.filter_by(
-        user_id=current_user.id,
-        group_id=group.id
-    ).first()
+    membership = next((m for m in memberships if m.user_id == current_user.id), None)
     
     if not membership and group.created_by != current_user.id:
         flash('You are not a member of this group.', 'error')
         return redirect(url_for('dashboard.index'))
     
-    # Get all members
-    memberships = Membership.query.filter_by(group_id=group.id).all()
-    
     return render_template(
         'view_group.html',
         group=group,
@@ -119,6 +129,7 @@ def view_group(group_id):
 
 @groups_bp.route('/view/<int:group_id>/delete', methods=['POST'])
 @login_required
+@serialize_writes
 def delete_group_from_view(group_id):
     """Delete a group from the view page (admin only)"""
     group = Group.query.get_or_404(group_id)
@@ -155,6 +166,7 @@ def delete_group_from_view(group_id):
 
 @groups_bp.route('/view/<int:group_id>/leave', methods=['POST'])
 @login_required
+@serialize_writes
 def leave_group_from_view(group_id):
     """Leave a group from the view page (regular members only)"""
     group = Group.query.get_or_404(group_id)
@@ -180,8 +192,8 @@ def leave_group_from_view(group_id):
         return redirect(url_for('groups.view_group', group_id=group.id))
     
     try:
-        # Delete the membership
-        db.session.delete(membership)
+        # Delete the membership and move later members up one position
+        release_slot(membership)
         db.session.commit()
         
         flash(f'You have left the group "{group.name}".', 'success')
@@ -195,6 +207,7 @@ def leave_group_from_view(group_id):
 
 @groups_bp.route('/view/<int:group_id>/remove-member/<int:member_id>', methods=['POST'])
 @login_required
+@serialize_writes
 def remove_member_from_view(group_id, member_id):
     """Remove a member from a group from the view page (admin only)"""
     group = Group.query.get_or_404(group_id)
@@ -205,7 +218,7 @@ def remove_member_from_view(group_id, member_id):
         return redirect(url_for('groups.view_group', group_id=group.id))
     
     # Get the membership to remove
-    membership = Membership.query.filter_by(
+    membership = Membership.query.options(joinedload(Membership.user)).filter_by(
         user_id=member_id,
         group_id=group.id
     ).first()
@@ -228,8 +241,8 @@ def remove_member_from_view(group_id, member_id):
         # Get member name for flash message
         member_name = membership.user.full_name
         
-        # Delete the membership
-        db.session.delete(membership)
+        # Delete the membership and move later members up one position
+        release_slot(membership)
         db.session.commit()
         
         flash(f'Member "{member_name}" has been removed from the group.', 'success')
@@ -245,7 +258,7 @@ def remove_member_from_view(group_id, member_id):
 @login_required
 def my_groups():
     """View all groups the user is a member of"""
-    user_memberships = current_user.memberships.all()
+    user_memberships = Membership.query.options(joinedload(Membership.group)).filter_by(user_id=current_user.id).all()
     user_groups = []
     
     for membership in user_memberships:
@@ -268,7 +281,7 @@ def my_groups():
 def debug_groups():
     """Debug route to check all groups and their status"""
     all_groups = Group.query.all()
-    user_memberships = current_user.memberships.all()
+    user_memberships = Membership.query.filter_by(user_id=current_user.id).all()
     
     debug_info = {
         'total_groups': len(all_groups),
@@ -282,7 +295,7 @@ def debug_groups():
             'name': group.name,
             'status': group.status,
             'cycle_size': group.cycle_size,
-            'current_members': group.memberships.count(),
+            'current_members': group.member_count,
             'is_full': group.is_full,
             'created_by': group.created_by,
             'user_is_member': group.id in [m.group_id for m in user_memberships],
@@ -296,6 +309,7 @@ def debug_groups():
 # New invitation routes
 @groups_bp.route('/invite/<int:group_id>', methods=['GET', 'POST'])
 @login_required
+@serialize_writes(methods=('POST',))
 def invite_members(group_id):
     """Invite members to join a group"""
     group = Group.query.get_or_404(group_id)
@@ -321,18 +335,17 @@ def invite_members(group_id):
         
         try:
             # Create invitation
-            invitation = GroupInvitation.create_invitation(
-                group_id=group.id,
-                invited_by=current_user.id,
-                invited_email=invited_email,
-                invited_phone=invited_phone,
-                invited_name=invited_name
-            )
+            contacts, errors = normalize_contacts([{
+                'invited_email': invited_email,
+                'invited_phone': invited_phone,
+                'invited_name': invited_name
+            }])
+            if not contacts:
+                flash(errors[0], 'error')
+                return redirect(url_for('groups.invite_members', group_id=group_id))
+            invitation = create_invitations_bulk(group, current_user.id, contacts)[0]
             
-            db.session.add(invitation)
-            db.session.commit()
-            
-            flash(f'Invitation sent successfully! Code: {invitation.invitation_code}', 'success')
+            flash(f'Invitation sent successfully! Code: {invitation["invitation_code"]}', 'success')
             return redirect(url_for('groups.view_invitations', group_id=group_id))
         except Exception as e:
             db.session.rollback()
@@ -342,10 +355,69 @@ def invite_members(group_id):
     return render_template('invite_members.html', group=group)
 
 
+@groups_bp.route('/invite/<int:group_id>/bulk', methods=['POST'])
+@login_required
+@serialize_writes
+def invite_members_bulk(group_id):
+    """Invite many contacts at once from a JSON list or a CSV upload (admin only)"""
+    group = Group.query.get_or_404(group_id)
+    wants_json = request.is_json
+    
+    if group.created_by != current_user.id:
+        if wants_json:
+            return jsonify({'error': 'Only the group creator can send bulk invitations'}), 403
+        flash('Only the group creator can send bulk invitations.', 'error')
+        return redirect(url_for('groups.invite_members', group_id=group_id))
+    
+    if wants_json:
+        data = request.get_json(silent=True)
+        contacts = data.get('contacts', []) if isinstance(data, dict) else None
+    else:
+        upload = request.files.get('contacts_file')
+        try:
+            csv_text = upload.read().decode('utf-8-sig') if upload else request.form.get('contacts_csv', '')
+        except UnicodeDecodeError:
+            flash('The contacts file must be UTF-8 encoded CSV; re-save it as "CSV UTF-8" and try again.', 'error')
+            return redirect(url_for('groups.invite_members', group_id=group_id))
+        contacts = parse_contacts_csv(csv_text)
+    
+    contacts, errors = normalize_contacts(contacts)
+    
+    try:
+        created = create_invitations_bulk(group, current_user.id, contacts)
+    except BulkInvitationError as e:
+        if wants_json:
+            return jsonify({'error': str(e), 'errors': errors}), 400
+        flash(str(e), 'error')
+        return redirect(url_for('groups.invite_members', group_id=group_id))
+    
+    if wants_json:
+        return jsonify({
+            'created': len(created),
+            'invitations': [
+                {field: row[field] for field in ('invitation_code', 'invited_name', 'invited_email', 'invited_phone')}
+                for row in created
+            ],
+            'errors': errors
+        }), 201 if created else 400
+    
+    if created:
+        flash(f'{len(created)} invitation(s) sent successfully!', 'success')
+    for error in errors:
+        flash(error, 'error')
+    if not created:
+        return redirect(url_for('groups.invite_members', group_id=group_id))
+    return redirect(url_for('groups.view_invitations', group_id=group_id))
+
+
 @groups_bp.route('/join/invitation/<invitation_code>', methods=['GET', 'POST'])
+@serialize_writes(methods=('POST',))
 def join_via_invitation(invitation_code):
     """Join a group using an invitation code"""
-    invitation = GroupInvitation.query.filter_by(invitation_code=invitation_code).first()
+    invitation = GroupInvitation.query.options(
+        joinedload(GroupInvitation.group),
+        joinedload(GroupInvitation.inviter)
+    ).filter_by(invitation_code=invitation_code).first()
     
     if not invitation:
         flash('Invalid invitation code.', 'error')
@@ -383,28 +455,23 @@ def join_via_invitation(invitation_code):
             return redirect(url_for('dashboard.index'))
         
         try:
-            # Add user to group
-            next_position = group.memberships.count() + 1
-            membership = Membership(
-                user_id=current_user.id,
-                group_id=group.id,
-                payout_order=next_position
-            )
-            
-            # Accept the invitation
+            # Claim a payout slot and accept the invitation in one transaction
+            payout_order, started = reserve_slot(group.id, current_user.id)
             invitation.accept(current_user.id)
-            
-            db.session.add(membership)
             db.session.commit()
             
             flash(f'You have successfully joined {group.name}!', 'success')
             
-            # Check if group is now full and can start
-            if GroupStateMachine.can_start(group.status, group.memberships.count(), group.cycle_size):
-                group.status = 'collecting'
-                db.session.commit()
+            if started:
                 flash(f'Group {group.name} is now complete and has started collecting contributions!', 'info')
             
+            return redirect(url_for('dashboard.index'))
+        except AlreadyMember as e:
+            flash(str(e), 'info')
+            return redirect(url_for('dashboard.index'))
+        except SlotUnavailable as e:
+            db.session.rollback()
+            flash(str(e), 'error')
             return redirect(url_for('dashboard.index'))
         except Exception as e:
             db.session.rollback()
@@ -437,9 +504,10 @@ def view_invitations(group_id):
 
 @groups_bp.route('/invitation/<int:invitation_id>/cancel', methods=['POST'])
 @login_required
+@serialize_writes
 def cancel_invitation(invitation_id):
     """Cancel an invitation"""
-    invitation = GroupInvitation.query.get_or_404(invitation_id)
+    invitation = GroupInvitation.query.options(joinedload(GroupInvitation.group)).get_or_404(invitation_id)
     
     # Check if user is the inviter or group creator
     if invitation.invited_by != current_user.id and invitation.group.created_by != current_user.id:
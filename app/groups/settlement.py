@@ -0,0 +1,179 @@
+"""
+Batch cycle settlement
+Settles groups a batch at a time with a fixed number of set-wise
+statements per batch, whatever its size. One SELECT finds the groups in
+the batch that are disbursing or collecting with every member paid,
+together with the cycle's recipient. The GroupStateMachine transitions are applied with
+transition_groups' compare-and-swap UPDATEs: collecting -> disbursing,
+then disbursing -> collecting for the next cycle, or -> complete after
+the last one. One INSERT adds the payout rows and one UPDATE resets the
+paid flags. A group changed by another writer between the SELECT and
+the UPDATEs fails the version check and is left for the next run.
+"""
+
+import time
+from datetime import datetime
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.orm import aliased
+from app.dialects import conflict_insert
+from app.extensions import db
+from app.models import Group, Membership, Transaction
+from app.groups.fsm import GroupStateMachine
+from app.groups.transitions import transition_groups
+import logging
+
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_COUNTS = ('checked', 'advanced', 'completed', 'payouts', 'conflicts')
+SETTLEABLE_STATES = ('collecting', 'disbursing')
+
+
+def settle_groups(group_ids, now=None):
+    """
+    Settle the current cycle of every fully paid group in a batch
+
+    Nothing is committed, so a batch is settled entirely or not at all.
+
+    Args:
+        group_ids (list): Ids of the groups to consider; disbursing groups
+            and fully paid collecting groups are settled, others skipped
+        now (datetime): Timestamp for the payout rows
+
+    Returns:
+        dict: Counts of groups checked, advanced to their next cycle,
+            completed, payouts written, and groups lost to a concurrent change
+    """
+    result = {'checked': len(group_ids), 'advanced': 0, 'completed': 0, 'payouts': 0, 'conflicts': 0}
+    if not group_ids:
+        return result
+
+    member = aliased(Membership)
+    unpaid = (
+        exists()
+        .where(
+            member.group_id == Group.id,
+            or_(member.has_paid_this_cycle.is_(False), member.has_paid_this_cycle.is_(None))
+        )
+    )
+    due = db.session.execute(
+        select(
+            Group.id.label('group_id'), Group.version, Group.status, Group.current_cycle, Group.cycle_size,
+            Group.weekly_amount, Group.member_count, Membership.id.label('recipient_id')
+        )
+        .join(Membership, and_(Membership.group_id == Group.id, Membership.payout_order == Group.current_cycle))
+        .where(
+            Group.id.in_(group_ids),
+            or_(Group.status == 'disbursing', and_(Group.status == 'collecting', ~unpaid))
+        )
+    ).all()
+
+    # collecting -> disbursing for the fully paid groups; groups already
+    # disbursing (left there by an earlier process or the seeder) join them
+    disbursing = transition_groups(
+        {row.group_id: row.version for row in due if GroupStateMachine.can_disburse(row.status, True)},
+        'collecting', 'disbursing'
+    )
+    disbursing.update({row.group_id: row.version for row in due if row.status == 'disbursing'})
+
+    # disbursing -> collecting for the next cycle, or -> complete after the last one
+    advancing, completing = {}, {}
+    for row in due:
+        if row.group_id in disbursing:
+            done = GroupStateMachine.is_complete('disbursing', row.current_cycle, row.cycle_size)
+            (completing if done else advancing)[row.group_id] = disbursing[row.group_id]
+    settled = set(transition_groups(advancing, 'disbursing', 'collecting', {'current_cycle': Group.current_cycle + 1}))
+    settled |= set(transition_groups(completing, 'disbursing', 'complete'))
+
+    now = now or datetime.utcnow()
+    payouts = [
+        {
+            'membership_id': row.recipient_id,
+            'amount': row.weekly_amount * row.member_count,
+            'tx_type': 'payout',
+            'reference': f'PAYOUT-{row.group_id}-{row.current_cycle}',
+            'timestamp': now,
+        }
+        for row in due if row.group_id in settled
+    ]
+    if payouts:
+        # A payout already written for the group's cycle is not written again
+        written = db.session.execute(
+            conflict_insert(Transaction)
+            .values(payouts)
+            .on_conflict_do_nothing(index_elements=['reference'])
+            .returning(Transaction.id)
+        ).all()
+        result['payouts'] = len(written)
+        db.session.execute(
+            update(Membership)
+            .where(Membership.group_id.in_(sorted(settled)))
+            .values(has_paid_this_cycle=False)
+            .execution_options(synchronize_session=False)
+        )
+
+    result['advanced'] = len(settled & advancing.keys())
+    result['completed'] = len(settled & completing.keys())
+    result['conflicts'] = len(due) - len(settled)
+    if result['conflicts']:
+        logger.info(f"{result['conflicts']} group(s) changed during settlement; left for the next run")
+    return result
+
+
+def due_group_ids(after_id, limit, partition=None):
+    """
+    Get the next ids of collecting or disbursing groups after after_id, in id order
+
+    Args:
+        partition (tuple): (index, count) to only return ids where
+            id % count == index
+    """
+    query = select(Group.id).where(Group.id > after_id, Group.status.in_(SETTLEABLE_STATES))
+    if partition is not None:
+        index, count = partition
+        query = query.where(Group.id % count == index)
+    return db.session.execute(query.order_by(Group.id).limit(limit)).scalars().all()
+
+
+def settle_due_groups(batch_size=1000, limit=None, progress=None):
+    """
+    Settle every due group, committing once per batch
+
+    Groups are walked in id order with keyset pagination, so each batch
+    is one indexed range read however many groups there are.
+
+    Args:
+        batch_size (int): Groups settled per transaction
+        limit (int): Stop after considering this many groups
+        progress (callable): Called with a status line after each batch
+
+    Returns:
+        dict: Totals of settle_groups' counts, plus batches and seconds
+    """
+    totals = {'checked': 0, 'advanced': 0, 'completed': 0, 'payouts': 0, 'conflicts': 0, 'batches': 0}
+    started = time.perf_counter()
+    last_id = 0
+
+    while limit is None or totals['checked'] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - totals['checked'])
+        group_ids = due_group_ids(last_id, size)
+        if not group_ids:
+            break
+
+        try:
+            result = settle_groups(group_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception(f"Settlement failed for groups {group_ids[0]}-{group_ids[-1]}")
+            raise
+
+        for key in SETTLEMENT_COUNTS:
+            totals[key] += result[key]
+        totals['batches'] += 1
+        last_id = group_ids[-1]
+        if progress:
+            progress(f"Batch {totals['batches']}: groups {group_ids[0]}-{last_id}, "
+                     f"{result['advanced']} advanced, {result['completed']} completed")
+
+    totals['seconds'] = time.perf_counter() - started
+    return totals
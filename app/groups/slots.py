@@ -0,0 +1,120 @@
+"""
+Payout slot reservation
+A join claims its payout position with one conditional UPDATE of the
+group's member_count. The UPDATE only matches while the group is forming
+and has a free slot, and it returns the new count. That UPDATE takes the
+group's row lock on PostgreSQL, or the database write lock on SQLite,
+so concurrent joins on one group are applied one after another. Each
+joiner gets a distinct payout_order and a group can't be overfilled.
+The membership insert and the forming -> collecting transition (through
+transition_group) happen in the same transaction.
+"""
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import Group, Membership
+from app.groups.fsm import GroupStateMachine
+from app.groups.transitions import expire_group, transition_group
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SlotUnavailable(Exception):
+    """Raised when a group is full, no longer forming, or missing"""
+
+
+class AlreadyMember(Exception):
+    """Raised when the user already has a membership in the group"""
+
+
+def reserve_slot(group_id, user_id):
+    """
+    Claim the next payout position in a forming group for a user
+
+    Nothing is committed, so the caller can add related changes (such as
+    accepting an invitation) to the same transaction. The group row stays
+    locked until the caller commits, so commit promptly.
+
+    Returns:
+        tuple: (payout_order, started), where started is True if this join
+            filled the group and moved it to collecting
+
+    Raises:
+        SlotUnavailable: If the group has no free slot or isn't forming
+        AlreadyMember: If the user already belongs to the group; the
+            transaction has been rolled back
+    """
+    claimed = db.session.execute(
+        update(Group)
+        .where(
+            Group.id == group_id,
+            Group.status == 'forming',
+            Group.member_count < Group.cycle_size
+        )
+        .values(member_count=Group.member_count + 1, version=Group.version + 1)
+        .returning(Group.member_count, Group.cycle_size)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if claimed is None:
+        raise SlotUnavailable('This group is full or no longer accepting new members.')
+
+    payout_order, cycle_size = claimed
+    try:
+        db.session.execute(insert(Membership).values(
+            user_id=user_id,
+            group_id=group_id,
+            payout_order=payout_order
+        ))
+    except IntegrityError:
+        db.session.rollback()
+        raise AlreadyMember('You are already a member of this group.')
+
+    started = GroupStateMachine.can_start('forming', payout_order, cycle_size)
+    if started:
+        # Only the join that took the last slot gets here, and it still
+        # holds the group's row lock, so the compare-and-swap can't conflict
+        transition_group(group_id, 'collecting', expected_state='forming', values={'current_cycle': 1}, commit=False)
+
+    expire_group(group_id)
+    return payout_order, started
+
+
+def release_slot(membership):
+    """
+    Remove a member from a forming group and close the gap in payout order
+
+    Members behind the leaver move up one position, so payout orders stay
+    1..member_count and the next reserve_slot hands out an unused one.
+    Nothing is committed.
+
+    Raises:
+        SlotUnavailable: If the group is no longer forming
+    """
+    group_id, payout_order = membership.group_id, membership.payout_order
+
+    # Lock the group row first, in the same order as reserve_slot
+    released = db.session.execute(
+        update(Group)
+        .where(Group.id == group_id, Group.status == 'forming')
+        .values(member_count=Group.member_count - 1, version=Group.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if released.rowcount == 0:
+        raise SlotUnavailable('Members can only leave while the group is forming.')
+
+    db.session.execute(
+        delete(Membership)
+        .where(Membership.id == membership.id)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Membership)
+        .where(Membership.group_id == group_id, Membership.payout_order > payout_order)
+        .values(payout_order=Membership.payout_order - 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.expunge(membership)
+    expire_group(group_id)
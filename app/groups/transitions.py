@@ -0,0 +1,142 @@
+"""
+Group state transitions
+Applies GroupStateMachine transitions with compare-and-swap UPDATEs
+(WHERE id = ? AND version = ? AND status = ?) instead of locking the
+group. Every write to a group's state bumps Group.version. When the CAS
+matches no row, another worker changed the group first: the transition
+is re-validated against the fresh row and retried, or reported as a
+TransitionConflict when it no longer applies.
+"""
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models import Group
+from app.groups.fsm import GroupStateMachine
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidTransition(Exception):
+    """Raised when the FSM doesn't allow moving a group to the requested state"""
+
+
+class TransitionConflict(Exception):
+    """Raised when another worker changed the group and the transition no longer applies"""
+
+
+def expire_group(group_id):
+    """Reload the group on next access if it is in the session"""
+    group = db.session.identity_map.get(identity_key(Group, group_id))
+    if group is not None:
+        db.session.expire(group)
+
+
+def transition_group(group_id, next_state, expected_state=None, values=None, retries=3, commit=True):
+    """
+    Move a group to next_state with a compare-and-swap UPDATE
+
+    Args:
+        group_id (int): The group to move
+        next_state (str): The state to move it to
+        expected_state (str): The state the caller based its decision on;
+            if the group has left it, the transition is not retried
+        values (dict): Other columns to set in the same UPDATE
+        retries (int): Extra attempts after a version conflict
+        commit (bool): Commit after a successful transition. Pass False to
+            make the transition part of a larger transaction; a conflict
+            is then raised straight away instead of retried, since
+            retrying means rolling back to read the other worker's write
+
+    Returns:
+        int: The group's new version
+
+    Raises:
+        InvalidTransition: If the FSM doesn't allow the transition
+        TransitionConflict: If concurrent changes made it inapplicable or
+            it kept conflicting after all retries
+    """
+    for attempt in range(retries + 1):
+        row = db.session.execute(
+            select(Group.status, Group.version).where(Group.id == group_id)
+        ).first()
+        if row is None:
+            raise InvalidTransition(f'Group {group_id} does not exist')
+
+        status, version = row
+        if expected_state is not None and status != expected_state:
+            raise TransitionConflict(
+                f'Group {group_id} is {status}, expected {expected_state}'
+            )
+        if not GroupStateMachine.validate_transition(status, next_state):
+            if attempt:
+                raise TransitionConflict(
+                    f'Group {group_id} moved to {status} concurrently; cannot move it to {next_state}'
+                )
+            raise InvalidTransition(f'Cannot move group {group_id} from {status} to {next_state}')
+
+        swapped = db.session.execute(
+            update(Group)
+            .where(Group.id == group_id, Group.version == version, Group.status == status)
+            .values(status=next_state, version=version + 1, **(values or {}))
+            .execution_options(synchronize_session=False)
+        )
+        if swapped.rowcount == 1:
+            if commit:
+                db.session.commit()
+            expire_group(group_id)
+            return version + 1
+
+        logger.info(f"Version conflict moving group {group_id} {status} -> {next_state} (attempt {attempt + 1})")
+        if not commit:
+            raise TransitionConflict(f'Group {group_id} changed concurrently; not moved to {next_state}')
+        # Start a new transaction so the retry reads the other worker's write
+        db.session.rollback()
+
+    raise TransitionConflict(
+        f'Group {group_id} kept changing; gave up moving it to {next_state} after {retries + 1} attempts'
+    )
+
+
+def transition_groups(versions, current_state, next_state, values=None):
+    """
+    Move many groups from current_state to next_state with one compare-and-swap UPDATE
+
+    The set-wise form of transition_group for batch jobs. Groups whose
+    version or state changed since the caller read them are left alone
+    and are missing from the result; there are no retries. Nothing is
+    committed.
+
+    Args:
+        versions (dict): Group id -> version the caller read
+        current_state (str): The state every group is expected to be in
+        next_state (str): The state to move them to
+        values (dict): Other columns to set in the same UPDATE; SQL
+            expressions are evaluated per row
+
+    Returns:
+        dict: Group id -> new version, for the groups that moved
+
+    Raises:
+        InvalidTransition: If the FSM doesn't allow the transition
+    """
+    if not GroupStateMachine.validate_transition(current_state, next_state):
+        raise InvalidTransition(f'Cannot move groups from {current_state} to {next_state}')
+    if not versions:
+        return {}
+
+    moved = dict(db.session.execute(
+        update(Group)
+        .where(tuple_(Group.id, Group.version).in_(list(versions.items())), Group.status == current_state)
+        .values(status=next_state, version=Group.version + 1, **(values or {}))
+        .returning(Group.id, Group.version)
+        .execution_options(synchronize_session=False)
+    ).all())
+
+    if len(moved) < len(versions):
+        logger.info(f"{len(versions) - len(moved)} group(s) changed concurrently; "
+                    f"not moved {current_state} -> {next_state}")
+    for group_id in moved:
+        expire_group(group_id)
+    return moved
@@ -0,0 +1,260 @@
+"""
+Request instrumentation
+Records per-endpoint latency, SQL statement count, DB time and template
+render time from Flask request hooks and SQLAlchemy engine events, plus
+timings for upstream calls (Supabase, Google), and serves them as
+Prometheus text at /metrics. Metrics are kept per process; scrape every
+worker or aggregate them upstream.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, list(zip(self.label_names, key)), value
+
+
+class Histogram:
+    """Cumulative histogram with labels"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            labels = list(zip(self.label_names, key))
+            for bound, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', labels + [('le', _format_number(bound))], count
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, counts[-1]
+
+
+class Gauge:
+    """Point-in-time values read from a callback when the metrics are rendered"""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, help_text, label_names, callback):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.callback = callback
+
+    def samples(self):
+        try:
+            values = list(self.callback())
+        except Exception as e:
+            logger.error(f"Failed to read gauge {self.name}: {e}")
+            return
+        for key, value in sorted(values):
+            yield self.name, list(zip(self.label_names, key)), value
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them as Prometheus text"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint', ('endpoint', 'method')))
+request_sql_statements = registry.register(Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request', ('endpoint',), COUNT_BUCKETS))
+request_db_duration = registry.register(Histogram(
+    'http_request_db_seconds', 'Time spent executing SQL per request', ('endpoint',)))
+request_template_duration = registry.register(Histogram(
+    'http_request_template_seconds', 'Time spent rendering templates per request', ('endpoint',)))
+requests_total = registry.register(Counter(
+    'http_requests_total', 'Requests by endpoint and status', ('endpoint', 'method', 'status')))
+upstream_duration = registry.register(Histogram(
+    'upstream_request_duration_seconds', 'Latency of calls to external services', ('service', 'operation')))
+upstream_errors = registry.register(Counter(
+    'upstream_errors_total', 'Failed calls to external services', ('service', 'operation')))
+
+
+def _request_stats():
+    """Get the current request's counters, or None outside a request"""
+    if not has_request_context():
+        return None
+    return g.get('_request_metrics')
+
+
+def record_upstream(service, operation, seconds, error=False):
+    """Record one call to an external service"""
+    upstream_duration.observe(seconds, service=service, operation=operation)
+    if error:
+        upstream_errors.inc(service=service, operation=operation)
+
+
+@contextmanager
+def track_upstream(service, operation):
+    """Time a block that calls an external service; exceptions count as errors"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_upstream(service, operation, time.perf_counter() - started, error=True)
+        raise
+    record_upstream(service, operation, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _request_stats()
+    if stats is not None:
+        stats['sql_statements'] += 1
+        stats['db_seconds'] += elapsed
+
+
+def _before_render_template(sender, template, context, **extra):
+    stats = _request_stats()
+    if stats is not None:
+        stats['template_started'].append(time.perf_counter())
+
+
+def _template_rendered(sender, template, context, **extra):
+    stats = _request_stats()
+    if stats is not None and stats['template_started']:
+        stats['template_seconds'] += time.perf_counter() - stats['template_started'].pop()
+
+
+def _start_request():
+    g._request_metrics = {
+        'started': time.perf_counter(),
+        'sql_statements': 0,
+        'db_seconds': 0.0,
+        'template_seconds': 0.0,
+        'template_started': [],
+    }
+
+
+def _finish_request(response):
+    stats = g.get('_request_metrics')
+    if stats is None:
+        return response
+
+    endpoint = request.endpoint or 'unmatched'
+    request_duration.observe(time.perf_counter() - stats['started'], endpoint=endpoint, method=request.method)
+    request_sql_statements.observe(stats['sql_statements'], endpoint=endpoint)
+    request_db_duration.observe(stats['db_seconds'], endpoint=endpoint)
+    request_template_duration.observe(stats['template_seconds'], endpoint=endpoint)
+    requests_total.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    return response
+
+
+def metrics_view():
+    """Serve the metrics as Prometheus text"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+_engine_listeners_installed = False
+
+
+def init_metrics(app):
+    """Install the request hooks and the admin-only /metrics endpoint"""
+    global _engine_listeners_installed
+
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    from app.auth.decorators import admin_required
+
+    # Listen on every engine, so replica engines are counted too
+    if not _engine_listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _engine_listeners_installed = True
+
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', admin_required(metrics_view))
@@ -1,14 +1,33 @@
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
+from app.cache import TTLCache
 from app.extensions import db, login_manager
 import secrets
 import string
 
 
+# Per-process cache of read-only user snapshots for Flask-Login
+user_cache = TTLCache(maxsize=10000, ttl=60)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user_cache(user_id):
+    """Drop a cached user snapshot so the next request reloads it"""
+    user_cache.pop(user_id)
 
 
 class User(UserMixin, db.Model):
@@ -60,6 +79,38 @@ class User(UserMixin, db.Model):
         return f'<User {self.full_name}>'
 
 
+class UserSnapshot(UserMixin):
+    """
+    Read-only copy of a User's profile fields, used as current_user.
+    Not bound to a session, so it can be cached across requests. Load the
+    User model when a change has to be written.
+    """
+    __slots__ = ('id', 'supabase_id', 'username', 'full_name', 'email', 'phone', 'created_at', 'updated_at')
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('UserSnapshot is read-only; update the User model instead')
+    
+    @classmethod
+    def from_user(cls, user):
+        """Create a snapshot from a User instance"""
+        return cls(**{name: getattr(user, name) for name in cls.__slots__})
+    
+    def __repr__(self):
+        return f'<UserSnapshot {self.full_name}>'
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    """Keep the user cache in step with writes made through the ORM"""
+    invalidate_user_cache(target.id)
+
+
 class Group(db.Model):
     """Group model for Susu savings groups"""
     __tablename__ = 'groups'
@@ -72,6 +123,8 @@ class Group(db.Model):
     weekly_amount = db.Column(db.Numeric(10, 2), nullable=False)  # Amount per week
     status = db.Column(db.String(20), default='forming')  # FSM state
     current_cycle = db.Column(db.Integer, default=0)  # Current payment cycle
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Denormalized membership count
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped on every state change (see groups.transitions)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -85,12 +138,18 @@ class Group(db.Model):
     @property
     def is_full(self):
         """Check if the group has reached its member limit"""
-        return self.memberships.count() >= self.cycle_size
+        return self.member_count >= self.cycle_size
     
     @property
     def available_slots(self):
         """Get the number of available slots in the group"""
-        return self.cycle_size - self.memberships.count()
+        return self.cycle_size - self.member_count
+    
+    def adjust_member_count(self, delta):
+        """Adjust the stored member count in the current transaction"""
+        # Use a SQL-side expression so concurrent updates don't overwrite each other
+        self.member_count = Group.member_count + delta
+        self.version = Group.version + 1
     
     @property
     def total_amount(self):
@@ -120,6 +179,10 @@ class Group(db.Model):
 class GroupInvitation(db.Model):
     """Invitation model for inviting users to join groups"""
     __tablename__ = 'group_invitations'
+    __table_args__ = (
+        db.Index('ix_group_invitations_group_id_created_at', 'group_id', 'created_at'),
+        db.Index('ix_group_invitations_status_expires_at', 'status', 'expires_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=False)
@@ -139,13 +202,21 @@ class GroupInvitation(db.Model):
     
     @classmethod
     def generate_invitation_code(cls):
-        """Generate a unique invitation code"""
-        while True:
-            # Generate 8-character alphanumeric code
-            code = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
-            # Check if code already exists
-            if not cls.query.filter_by(invitation_code=code).first():
-                return code
+        """
+        Generate a random invitation code.
+        Uniqueness is enforced by the unique constraint on insert, so
+        callers retry on IntegrityError instead of querying first.
+        """
+        # Generate 8-character alphanumeric code
+        return ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
+    
+    @classmethod
+    def generate_invitation_codes(cls, count):
+        """Generate a batch of invitation codes that are distinct from each other"""
+        codes = set()
+        while len(codes) < count:
+            codes.add(cls.generate_invitation_code())
+        return list(codes)
     
     @classmethod
     def create_invitation(cls, group_id, invited_by, invited_email=None, invited_phone=None, invited_name=None, expires_in_hours=48):
@@ -181,6 +252,10 @@ class GroupInvitation(db.Model):
 class Membership(db.Model):
     """Membership model for user participation in groups"""
     __tablename__ = 'memberships'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'group_id', name='uq_memberships_user_id_group_id'),
+        db.Index('ix_memberships_group_id_payout_order', 'group_id', 'payout_order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -205,13 +280,42 @@ class Membership(db.Model):
 class Transaction(db.Model):
     """Transaction model for contributions and payouts"""
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_membership_id_tx_type_timestamp', 'membership_id', 'tx_type', 'timestamp'),
+        db.Index('ix_transactions_reference', 'reference', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     membership_id = db.Column(db.Integer, db.ForeignKey('memberships.id'), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     tx_type = db.Column(db.String(20), nullable=False)  # 'contribution' or 'payout'
-    reference = db.Column(db.String(100))  # Payment reference
+    reference = db.Column(db.String(100))  # Payment reference; unique, so retried callbacks are ignored
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Transaction {self.tx_type} {self.amount}>'
\ No newline at end of file
+        return f'<Transaction {self.tx_type} {self.amount}>'
+
+class AuthIdentity(db.Model):
+    """Local mirror of Supabase auth users, kept in sync by `flask auth sync-identities`"""
+    __tablename__ = 'auth_identities'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    supabase_id = db.Column(db.String(255), unique=True, nullable=False)
+    email = db.Column(db.String(120), index=True)  # Normalized to lower case
+    phone = db.Column(db.String(20))
+    full_name = db.Column(db.String(100))
+    updated_at = db.Column(db.DateTime, index=True)  # Supabase updated_at, used as the sync cursor
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AuthIdentity {self.email}>'
+    
+    @staticmethod
+    def normalize_email(email):
+        """Normalize an email address for lookups"""
+        return email.strip().lower() if email else None
+    
+    @classmethod
+    def find_by_email(cls, email):
+        """Find a mirrored identity by email using the email index"""
+        return cls.query.filter_by(email=cls.normalize_email(email)).first()
@@ -0,0 +1,325 @@
+"""
+Contribution ingestion
+Records contribution payments as Transaction rows and sets the payer's
+has_paid_this_cycle flag. Every payment carries the provider's reference,
+and transactions.reference has a unique index. Inserts use ON CONFLICT
+DO NOTHING on that index, so a mobile-money callback that is retried
+never counts twice. A batch of payments takes a fixed number of
+statements and one commit, however many payments it holds: two SELECTs
+validate the memberships and find known references, one INSERT adds the
+transactions and one UPDATE flips the paid flags.
+
+Callbacks usually carry a single payment each. ContributionBatcher
+collects the payments of concurrent requests for up to
+CONTRIBUTION_BATCH_WAIT_MS, so that an end-of-week burst is written in
+batches of up to CONTRIBUTION_BATCH_SIZE and not as one commit per
+payment.
+"""
+
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import delete, or_, select, update
+from app.extensions import db
+from app.dialects import conflict_insert
+from app.metrics import registry, Counter, Histogram, COUNT_BUCKETS
+from app.models import Group, Membership, Transaction
+from app.sqlite_tuning import serialized_write
+import logging
+
+logger = logging.getLogger(__name__)
+
+contributions_total = registry.register(Counter(
+    'contributions_total', 'Contribution payments received by outcome', ('outcome',)))
+contribution_batch_size = registry.register(Histogram(
+    'contribution_batch_size', 'Payments written per contribution batch', (), COUNT_BUCKETS))
+
+
+# Largest value of the 32-bit integer id columns
+MAX_ID = 2 ** 31 - 1
+MAX_AMOUNT = Decimal('100000000')
+
+
+class InvalidPayment(Exception):
+    """Raised when a payment is missing fields or has malformed values"""
+
+
+class BatcherUnavailable(Exception):
+    """Raised when a queued payment wasn't written within the wait timeout"""
+
+
+def parse_payment(data):
+    """
+    Validate one payment from a request body
+
+    Returns:
+        dict: reference, membership_id and amount (Decimal)
+
+    Raises:
+        InvalidPayment: If a field is missing or malformed
+    """
+    if not isinstance(data, dict):
+        raise InvalidPayment('Each payment must be an object')
+
+    reference = data.get('reference')
+    if not isinstance(reference, str) or not reference.strip() or len(reference.strip()) > 100:
+        raise InvalidPayment('reference must be a non-empty string of at most 100 characters')
+
+    membership_id = data.get('membership_id')
+    if isinstance(membership_id, bool) or not isinstance(membership_id, int):
+        raise InvalidPayment('membership_id must be an integer')
+    if not 1 <= membership_id <= MAX_ID:
+        raise InvalidPayment(f'membership_id must be between 1 and {MAX_ID}')
+
+    try:
+        amount = Decimal(str(data.get('amount')))
+    except InvalidOperation:
+        raise InvalidPayment('amount must be a number')
+    if not amount.is_finite() or amount <= 0:
+        raise InvalidPayment('amount must be positive')
+    # Fit Transaction.amount, a Numeric(10, 2)
+    if amount.as_tuple().exponent < -2 or amount >= MAX_AMOUNT:
+        raise InvalidPayment(f'amount must be below {MAX_AMOUNT} with at most 2 decimal places')
+
+    return {'reference': reference.strip(), 'membership_id': membership_id, 'amount': amount}
+
+
+def _record_batch(payments, now):
+    """
+    Write one batch of parsed payments in a single transaction
+
+    Returns:
+        list: One result dict per payment, in order
+    """
+    results = [{'reference': payment['reference']} for payment in payments]
+
+    memberships = {
+        row.id: row for row in db.session.execute(
+            select(Membership.id, Membership.has_paid_this_cycle, Group.status, Group.weekly_amount)
+            .join(Group, Group.id == Membership.group_id)
+            .where(Membership.id.in_(sorted({payment['membership_id'] for payment in payments})))
+        )
+    }
+    # Retries of recorded payments are duplicates even though the member has paid since
+    seen_references = set(db.session.execute(
+        select(Transaction.reference)
+        .where(Transaction.reference.in_(sorted({payment['reference'] for payment in payments})))
+    ).scalars())
+
+    # Only the first payment per reference and per membership goes on to the insert
+    accepted, seen_memberships = [], set()
+    for result, payment in zip(results, payments):
+        membership = memberships.get(payment['membership_id'])
+        if payment['reference'] in seen_references:
+            result['status'] = 'duplicate'
+        elif membership is None:
+            result.update(status='rejected', error='Unknown membership')
+        elif membership.status != 'collecting':
+            result.update(status='rejected', error='The group is not collecting contributions')
+        elif payment['amount'] != membership.weekly_amount:
+            result.update(status='rejected', error=f'Amount must be {membership.weekly_amount}')
+        elif membership.has_paid_this_cycle or payment['membership_id'] in seen_memberships:
+            result.update(status='rejected', error='Already paid this cycle')
+        else:
+            accepted.append((result, payment))
+            seen_memberships.add(payment['membership_id'])
+        seen_references.add(payment['reference'])
+
+    if accepted:
+        inserted = set(db.session.execute(
+            conflict_insert(Transaction)
+            .values([
+                {
+                    'membership_id': payment['membership_id'],
+                    'amount': payment['amount'],
+                    'tx_type': 'contribution',
+                    'reference': payment['reference'],
+                    'timestamp': now,
+                }
+                for _, payment in accepted
+            ])
+            .on_conflict_do_nothing(index_elements=['reference'])
+            .returning(Transaction.reference)
+        ).scalars())
+
+        # The conditional UPDATE locks the rows, so of two concurrent payments
+        # with different references for one membership only one flips the flag
+        flipped = set(db.session.execute(
+            update(Membership)
+            .where(
+                Membership.id.in_([payment['membership_id'] for _, payment in accepted
+                                   if payment['reference'] in inserted]),
+                or_(Membership.has_paid_this_cycle.is_(False), Membership.has_paid_this_cycle.is_(None))
+            )
+            .values(has_paid_this_cycle=True)
+            .returning(Membership.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+
+        late = []
+        for result, payment in accepted:
+            if payment['reference'] not in inserted:
+                result['status'] = 'duplicate'
+            elif payment['membership_id'] not in flipped:
+                result.update(status='rejected', error='Already paid this cycle')
+                late.append(payment['reference'])
+            else:
+                result['status'] = 'recorded'
+        if late:
+            db.session.execute(delete(Transaction).where(Transaction.reference.in_(late)))
+
+    db.session.commit()
+    contribution_batch_size.observe(len(payments))
+    for result in results:
+        contributions_total.inc(outcome=result['status'])
+    return results
+
+
+def record_contributions(payments, batch_size=500):
+    """
+    Record parsed payments, committing once per batch_size payments
+
+    A reference that is already stored is reported as a duplicate and
+    changes nothing. A payment is rejected if its membership is unknown,
+    its group isn't collecting, the amount isn't the group's weekly
+    amount, or the member has already paid this cycle.
+
+    Args:
+        payments (list): Dicts from parse_payment
+        batch_size (int): Payments written per transaction
+
+    Returns:
+        list: One dict per payment, in order, with its reference, a
+            status of recorded, duplicate or rejected, and an error for
+            rejected payments
+    """
+    now = datetime.utcnow()
+    results = []
+    for start in range(0, len(payments), batch_size):
+        # Takes the write lock up front in SQLite high-concurrency mode
+        with serialized_write():
+            try:
+                results.extend(_record_batch(payments[start:start + batch_size], now))
+            except Exception:
+                db.session.rollback()
+                raise
+    return results
+
+
+class _Pending:
+    """Payments of one caller waiting in a ContributionBatcher"""
+
+    def __init__(self, payments):
+        self.payments = payments
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class ContributionBatcher:
+    """
+    Coalesces payments from concurrent requests into shared batches
+
+    A background thread (started on first use) takes the first waiting
+    caller's payments, then keeps collecting for up to max_wait_ms or
+    until max_batch payments are queued, and writes them all with
+    record_contributions. Each caller blocks until its payments are
+    written and gets back its own results. If a shared batch fails, each
+    caller's payments are retried on their own, so an error only reaches
+    the caller whose payments caused it.
+    """
+
+    def __init__(self, app, max_batch=500, max_wait_ms=10, timeout=30):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._queue = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, payments):
+        """
+        Record payments as part of the next batch
+
+        Returns:
+            list: The results of record_contributions for these payments
+
+        Raises:
+            BatcherUnavailable: If the payments weren't written within the timeout
+        """
+        if self.max_wait <= 0 or len(payments) >= self.max_batch:
+            return record_contributions(payments, batch_size=self.max_batch)
+
+        pending = _Pending(payments)
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='contribution-batcher', daemon=True)
+                self._thread.start()
+            self._queue.append(pending)
+            self._condition.notify()
+
+        if not pending.done.wait(self.timeout):
+            raise BatcherUnavailable(f'Payments not written within {self.timeout}s')
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def _take_batch(self):
+        """Wait for a caller, then gather callers until the batch is full or the wait is over"""
+        with self._condition:
+            while not self._queue:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(pending.payments) for pending in self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch, queued = [], 0
+            while self._queue and (not batch or queued + len(self._queue[0].payments) <= self.max_batch):
+                pending = self._queue.pop(0)
+                batch.append(pending)
+                queued += len(pending.payments)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            with self.app.app_context():
+                try:
+                    results = record_contributions(
+                        [payment for pending in batch for payment in pending.payments],
+                        batch_size=self.max_batch
+                    )
+                    start = 0
+                    for pending in batch:
+                        pending.results = results[start:start + len(pending.payments)]
+                        start += len(pending.payments)
+                except Exception as e:
+                    if len(batch) == 1:
+                        logger.exception("Failed to write a contribution request")
+                        batch[0].error = e
+                    else:
+                        # Retry each caller on its own so one bad request can't fail the others
+                        logger.exception(f"Failed to write a batch of {len(batch)} contribution requests; "
+                                         f"retrying them one by one")
+                        for pending in batch:
+                            try:
+                                pending.results = record_contributions(pending.payments, batch_size=self.max_batch)
+                            except Exception as retry_error:
+                                logger.exception("Failed to write a contribution request")
+                                pending.error = retry_error
+            for pending in batch:
+                pending.done.set()
+
+
+def init_contributions(app):
+    """Create the app's ContributionBatcher from CONTRIBUTION_BATCH_SIZE and CONTRIBUTION_BATCH_WAIT_MS"""
+    app.extensions['contribution_batcher'] = ContributionBatcher(
+        app,
+        max_batch=app.config.get('CONTRIBUTION_BATCH_SIZE', 500),
+        max_wait_ms=app.config.get('CONTRIBUTION_BATCH_WAIT_MS', 10),
+    )
@@ -1,5 +1,8 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, current_app, jsonify, render_template, request
 from flask_login import login_required, current_user
+from app.auth.decorators import payments_token_required
+from app.extensions import csrf
+from app.payments.contributions import BatcherUnavailable, InvalidPayment, parse_payment
 
 # Create blueprint
 payments_bp = Blueprint('payments', __name__, url_prefix='/payments')
@@ -48,4 +51,42 @@ def index():
     
     return render_template('payments/index.html', 
                          upcoming_payments=upcoming_payments,
-                         past_payments=past_payments) 
\ No newline at end of file
+                         past_payments=past_payments) 
+
+
+@payments_bp.route('/contributions', methods=['POST'])
+@csrf.exempt
+@payments_token_required
+def record_contributions():
+    """
+    Record contribution payments from the mobile-money provider
+
+    Accepts one payment object or {"payments": [...]}, each with
+    reference, membership_id and amount. Retried callbacks are reported
+    as duplicates and change nothing.
+    """
+    data = request.get_json(silent=True)
+    single = isinstance(data, dict) and 'payments' not in data
+    if single:
+        items = [data]
+    else:
+        items = data.get('payments') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a payment object or {"payments": [...]}'}), 400
+
+    try:
+        payments = [parse_payment(item) for item in items]
+    except InvalidPayment as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        results = current_app.extensions['contribution_batcher'].submit(payments)
+    except BatcherUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+
+    if single:
+        return jsonify(results[0]), 422 if results[0]['status'] == 'rejected' else 200
+
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ('recorded', 'duplicate', 'rejected')}
+    return jsonify(dict(counts, results=results))
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
 from app.extensions import db
-from app.models import User
+from app.models import User, invalidate_user_cache
 
 # Create blueprint
 profile_bp = Blueprint('profile', __name__, url_prefix='/profile')
@@ -19,6 +19,9 @@ def settings():
 def update_settings():
     """Update user profile settings"""
     try:
+        # current_user is a cached read-only snapshot; load the model to update it
+        user = db.session.get(User, current_user.id)
+        
         # Get form data
         full_name = request.form.get('full_name')
         email = request.form.get('email')
@@ -28,28 +31,28 @@ def update_settings():
         confirm_password = request.form.get('confirm_password')
         
         # Update basic info
-        if full_name and full_name != current_user.full_name:
-            current_user.full_name = full_name
+        if full_name and full_name != user.full_name:
+            user.full_name = full_name
         
-        if email and email != current_user.email:
+        if email and email != user.email:
             # Check if email is already taken
             existing_user = User.query.filter_by(email=email).first()
-            if existing_user and existing_user.id != current_user.id:
+            if existing_user and existing_user.id != user.id:
                 flash('Email address is already in use.', 'error')
                 return redirect(url_for('profile.settings'))
-            current_user.email = email
+            user.email = email
         
-        if phone and phone != current_user.phone:
+        if phone and phone != user.phone:
             # Check if phone is already taken
             existing_user = User.query.filter_by(phone=phone).first()
-            if existing_user and existing_user.id != current_user.id:
+            if existing_user and existing_user.id != user.id:
                 flash('Phone number is already in use.', 'error')
                 return redirect(url_for('profile.settings'))
-            current_user.phone = phone
+            user.phone = phone
         
         # Update password if provided
         if current_password and new_password and confirm_password:
-            if not current_user.verify_password(current_password):
+            if not user.verify_password(current_password):
                 flash('Current password is incorrect.', 'error')
                 return redirect(url_for('profile.settings'))
             
@@ -61,9 +64,10 @@ def update_settings():
                 flash('Password must be at least 6 characters long.', 'error')
                 return redirect(url_for('profile.settings'))
             
-            current_user.password = new_password
+            user.password = new_password
         
         db.session.commit()
+        invalidate_user_cache(user.id)
         flash('Profile updated successfully!', 'success')
         
     except Exception as e:
@@ -0,0 +1,266 @@
+"""
+Request profiling
+Samples the stack of the request's thread while it runs and writes the
+result as collapsed stacks (one "frame;frame;frame count" line per
+stack), which flamegraph.pl, speedscope or inferno render directly.
+PROFILE_MODE 'trace' records every call with sys.setprofile instead,
+which is exact for short requests but slows them down.
+A request is profiled when it was chosen by PROFILE_SAMPLE_RATE, or when
+an admin has armed a capture for its endpoint ("profile the next N
+requests to X"). Captures are armed per worker process.
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+from flask_login import current_user
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Endpoint -> {'remaining': requests left to profile, 'mode': profiler mode}
+_armed = {}
+_armed_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    Samples one thread's stack from a background thread
+
+    Args:
+        thread_id (int): Identifier of the thread to sample
+        interval (float): Seconds between samples
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[collapse_stack(frame)] += 1
+
+
+class TracingProfiler:
+    """
+    Records exact time per call stack using sys.setprofile on the current thread
+
+    Catches short requests that a sampler would miss, at the cost of
+    slowing the profiled request down. Counts are microseconds of self time.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._stack = []
+
+    def start(self):
+        sys.setprofile(self._profile)
+        return self
+
+    def stop(self):
+        sys.setprofile(None)
+        return self.counts
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == 'call':
+            code = frame.f_code
+            self._stack.append([f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})', now, 0.0])
+        elif event == 'c_call':
+            self._stack.append([f'{getattr(arg, "__qualname__", arg)} (builtin)', now, 0.0])
+        elif event in ('return', 'c_return', 'c_exception') and self._stack:
+            path = ';'.join(entry[0] for entry in self._stack)
+            name, started, child_time = self._stack.pop()
+            elapsed = now - started
+            self.counts[path] += max(int((elapsed - child_time) * 1_000_000), 0)
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+
+def collapse_stack(frame):
+    """Render a frame and its callers as root-first, semicolon-separated frames"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(frames))
+
+
+def arm_capture(endpoint, count, mode=None):
+    """
+    Profile the next count requests to endpoint; a count of 0 disarms it
+
+    Args:
+        mode (str): 'sample' or 'trace'; defaults to PROFILE_MODE
+    """
+    with _armed_lock:
+        if count > 0:
+            _armed[endpoint] = {'remaining': count, 'mode': mode}
+        else:
+            _armed.pop(endpoint, None)
+
+
+def armed_captures():
+    """Get the endpoints with armed captures, their mode and how many requests remain"""
+    with _armed_lock:
+        return {endpoint: dict(capture) for endpoint, capture in _armed.items()}
+
+
+def _take_armed(endpoint):
+    """
+    Use up one armed capture for endpoint
+
+    Returns:
+        dict: The capture, or None if none is armed
+    """
+    with _armed_lock:
+        capture = _armed.get(endpoint)
+        if not capture:
+            return None
+        capture['remaining'] -= 1
+        if capture['remaining'] <= 0:
+            del _armed[endpoint]
+        return capture
+
+
+def profile_dir(app=None):
+    app = app or current_app
+    return app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def hash_user_id(user_id):
+    """Hash a user id so profiles can be grouped by user without identifying them"""
+    salted = f"{current_app.config['SECRET_KEY']}:{user_id}".encode('utf-8')
+    return hashlib.sha256(salted).hexdigest()[:16]
+
+
+def list_profiles(limit=50):
+    """Get metadata for the most recent profiles, newest first"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((name for name in os.listdir(directory) if name.endswith('.json')), reverse=True)
+    profiles = []
+    for name in names[:limit]:
+        with open(os.path.join(directory, name)) as f:
+            profiles.append(json.load(f))
+    return profiles
+
+
+def _prune(directory, max_profiles):
+    """Delete the oldest profiles beyond max_profiles"""
+    names = sorted(name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json'))
+    for name in names[:max(len(names) - max_profiles, 0)]:
+        for extension in ('.json', '.collapsed'):
+            try:
+                os.remove(os.path.join(directory, name + extension))
+            except FileNotFoundError:
+                pass
+
+
+def _start_profile():
+    endpoint = request.endpoint
+    if endpoint is None:
+        return
+
+    mode = current_app.config.get('PROFILE_MODE', 'sample')
+    capture = _take_armed(endpoint)
+    if capture:
+        reason = 'armed'
+        mode = capture['mode'] or mode
+    else:
+        rate = current_app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        if not rate or random.random() >= rate:
+            return
+        reason = 'sampled'
+
+    if mode == 'trace':
+        profiler = TracingProfiler()
+    else:
+        mode = 'sample'
+        profiler = StackSampler(threading.get_ident(), current_app.config.get('PROFILE_INTERVAL_MS', 2) / 1000)
+
+    g._profile = {
+        'reason': reason,
+        'mode': mode,
+        'started': time.perf_counter(),
+        'profiler': profiler.start(),
+    }
+
+
+def _finish_profile(response):
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return response
+
+    counts = profile['profiler'].stop()
+    duration = time.perf_counter() - profile['started']
+    request_stats = g.get('_request_metrics') or {}
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.endpoint}"
+    metadata = {
+        'name': name,
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'reason': profile['reason'],
+        'mode': profile['mode'],
+        'duration_ms': round(duration * 1000, 3),
+        'sql_statements': request_stats.get('sql_statements'),
+        'user_id_hash': hash_user_id(user_id) if user_id else None,
+        'unit': 'microseconds' if profile['mode'] == 'trace' else 'samples',
+        'total': sum(counts.values()),
+        'created_at': datetime.utcnow().isoformat(),
+    }
+
+    try:
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'{name}.collapsed'), 'w') as f:
+            for stack, count in counts.most_common():
+                f.write(f'{stack} {count}\n')
+        with open(os.path.join(directory, f'{name}.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        _prune(directory, current_app.config.get('PROFILE_MAX_FILES', 500))
+    except OSError as e:
+        logger.error(f"Failed to write profile {name}: {e}")
+
+    return response
+
+
+def _abandon_profile(exc):
+    """Stop a profiler that after_request never reached"""
+    profile = g.pop('_profile', None)
+    if profile is not None:
+        profile['profiler'].stop()
+
+
+def init_profiling(app):
+    """Install the profiling request hooks"""
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abandon_profile)
@@ -0,0 +1,140 @@
+"""
+Query plan helpers
+Runs EXPLAIN for SQLite and PostgreSQL and checks whether a statement
+is served by an index or falls back to a full table scan.
+"""
+
+import json
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Membership, Transaction, GroupInvitation
+
+
+def hot_queries():
+    """
+    Get the statements behind the app's hot lookup paths
+
+    Returns:
+        dict: Mapping of query name to SQLAlchemy select statement
+    """
+    return {
+        'membership_by_user_and_group': db.select(Membership).where(
+            Membership.user_id == 1,
+            Membership.group_id == 1
+        ),
+        'group_roster': db.select(Membership).where(
+            Membership.group_id == 1
+        ).order_by(Membership.payout_order),
+        'transactions_by_membership_and_type': db.select(Transaction).where(
+            Transaction.membership_id == 1,
+            Transaction.tx_type == 'contribution'
+        ).order_by(Transaction.timestamp.desc()),
+        'group_invitations_by_created_at': db.select(GroupInvitation).where(
+            GroupInvitation.group_id == 1
+        ).order_by(GroupInvitation.created_at.desc()),
+        'expired_pending_invitations': db.select(GroupInvitation.id).where(
+            GroupInvitation.status == 'pending',
+            GroupInvitation.expires_at < func.current_timestamp()
+        ),
+    }
+
+
+_EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN (FORMAT JSON) ',
+}
+
+
+def _explain_prefix(dialect):
+    if dialect not in _EXPLAIN_PREFIXES:
+        raise ValueError(f'EXPLAIN is not supported for dialect {dialect}')
+    return _EXPLAIN_PREFIXES[dialect]
+
+
+def _plan_lines(dialect, rows):
+    """Turn EXPLAIN result rows into plan lines"""
+    if dialect == 'sqlite':
+        return [row[-1] for row in rows]
+
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _flatten_pg_plan(plan[0]['Plan'])
+
+
+def explain(connection, sql, params=None):
+    """
+    Get the query plan for a SQL string on the connection's dialect
+
+    Returns:
+        list: Plan lines (SQLite detail rows or PostgreSQL node descriptions)
+    """
+    dialect = connection.dialect.name
+    prefix = _explain_prefix(dialect)
+    default_params = () if dialect == 'sqlite' else {}
+    rows = connection.exec_driver_sql(prefix + sql, params or default_params).fetchall()
+    return _plan_lines(dialect, rows)
+
+
+def explain_with_cursor(cursor, dialect, sql, params=None):
+    """
+    Same as explain, but on a raw DB-API cursor
+
+    Used from engine event handlers, where going through the SQLAlchemy
+    connection would fire the handlers again.
+    """
+    prefix = _explain_prefix(dialect)
+    if params:
+        cursor.execute(prefix + sql, params)
+    else:
+        cursor.execute(prefix + sql)
+    return _plan_lines(dialect, cursor.fetchall())
+
+
+def _flatten_pg_plan(node):
+    """Flatten a PostgreSQL JSON plan tree into node descriptions"""
+    description = node['Node Type']
+    if 'Relation Name' in node:
+        description += f" on {node['Relation Name']}"
+    if 'Index Name' in node:
+        description += f" using {node['Index Name']}"
+
+    lines = [description]
+    for child in node.get('Plans', []):
+        lines.extend(_flatten_pg_plan(child))
+    return lines
+
+
+def is_full_scan(plan_line):
+    """Check if a plan line describes a table scan that uses no index"""
+    if plan_line.startswith('Seq Scan'):
+        return True
+    return plan_line.startswith('SCAN ') and 'INDEX' not in plan_line
+
+
+def check_hot_queries(engine):
+    """
+    EXPLAIN every hot query and report which ones scan a full table
+
+    On PostgreSQL sequential scans are disabled for the check so that
+    small tables still show whether a usable index exists.
+
+    Returns:
+        dict: Mapping of query name to (plan lines, uses_index) tuples
+    """
+    results = {}
+
+    with engine.connect() as connection:
+        with connection.begin():
+            if connection.dialect.name == 'postgresql':
+                connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+
+            for name, statement in hot_queries().items():
+                compiled = statement.compile(
+                    dialect=connection.dialect,
+                    compile_kwargs={'literal_binds': True}
+                )
+                plan = explain(connection, str(compiled))
+                results[name] = (plan, not any(is_full_scan(line) for line in plan))
+
+    return results
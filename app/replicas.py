@@ -0,0 +1,107 @@
+"""
+Read-replica routing
+GET requests to the read-only views are served from one of the replica
+databases in DATABASE_REPLICA_URLS; everything else uses the primary.
+After a user writes (any non-GET request, or a flush during a GET), their
+session sticks to the primary for REPLICA_STICKY_SECONDS so they read
+their own writes while the replicas catch up.
+"""
+
+import random
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Views that only read; their GET requests may be served by a replica
+READ_ONLY_ENDPOINTS = frozenset({
+    'dashboard.index',
+    'groups.my_groups',
+    'groups.view_group',
+    'groups.view_invitations',
+    'history.index',
+    'payments.index',
+})
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_STICKY_SESSION_KEY = '_db_primary_until'
+
+
+def replica_bind_keys(app=None):
+    """Get the SQLALCHEMY_BINDS keys of the configured replicas"""
+    app = app or current_app
+    return [f'replica_{i}' for i in range(len(app.config.get('DATABASE_REPLICA_URLS') or []))]
+
+
+def _replica_for_request():
+    """Get the bind key the current request reads from, or None for the primary"""
+    if not has_request_context():
+        return None
+    return g.get('_db_replica')
+
+
+def _mark_primary_write():
+    """Send the rest of this request, and the user's next few, to the primary"""
+    if has_request_context():
+        g._db_replica = None
+        g._db_wrote = True
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica when the request was routed to one
+
+    Flushes and DML statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                _mark_primary_write()
+            else:
+                key = _replica_for_request()
+                if key is not None:
+                    return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _route_request():
+    g._db_replica = None
+    if request.method not in SAFE_METHODS or request.endpoint not in READ_ONLY_ENDPOINTS:
+        return
+    if session.get(_STICKY_SESSION_KEY, 0) > time.time():
+        return
+    g._db_replica = random.choice(replica_bind_keys())
+
+
+def _stick_to_primary(response):
+    if request.method not in SAFE_METHODS or g.get('_db_wrote'):
+        session[_STICKY_SESSION_KEY] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+    return response
+
+
+def init_replicas(app):
+    """
+    Register the replica binds and the routing hooks
+
+    Must run before db.init_app so the replica engines are created, and
+    after configure_pool so they get the same pool class.
+    """
+    urls = app.config.get('DATABASE_REPLICA_URLS') or []
+    if not urls:
+        return
+
+    # SQLALCHEMY_ENGINE_OPTIONS only applies to the default bind, so give
+    # each replica the primary's pool settings explicitly
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for key, url in zip(replica_bind_keys(app), urls):
+        binds[key] = dict(engine_options, url=url)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    app.before_request(_route_request)
+    app.after_request(_stick_to_primary)
+    logger.info(f"Routing read-only views to {len(urls)} replica(s)")
@@ -0,0 +1,301 @@
+"""
+Synthetic data generator
+Loads a realistic volume of users, groups, memberships, invitations and
+transactions for load testing. Groups are spread across every
+GroupStateMachine state, and their contribution/payout history matches
+current_cycle. Rows are written in batches with executemany, or with
+COPY when running on PostgreSQL with psycopg2/psycopg.
+"""
+
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func
+from app.extensions import db
+from app.models import User, Group, Membership, GroupInvitation, Transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Share of generated groups in each FSM state
+STATUS_WEIGHTS = {
+    'forming': 0.15,
+    'collecting': 0.50,
+    'disbursing': 0.10,
+    'complete': 0.25,
+}
+
+WEEKLY_AMOUNTS = [Decimal(amount) for amount in ('20.00', '50.00', '100.00', '150.00', '200.00', '500.00')]
+
+FIRST_NAMES = ['Kwame', 'Ama', 'Kofi', 'Akosua', 'Yaw', 'Abena', 'Kwabena', 'Adwoa', 'Kojo', 'Efua',
+               'Kwaku', 'Afua', 'Fiifi', 'Esi', 'Kweku', 'Yaa', 'Chidi', 'Ngozi', 'Tunde', 'Amara']
+LAST_NAMES = ['Mensah', 'Asante', 'Owusu', 'Boateng', 'Osei', 'Appiah', 'Addo', 'Amoah', 'Agyeman',
+              'Darko', 'Ofori', 'Antwi', 'Okafor', 'Adeyemi', 'Nwosu', 'Bello']
+
+# Tables in foreign key order; parents are always flushed before children
+TABLES = [User.__table__, Group.__table__, Membership.__table__, GroupInvitation.__table__, Transaction.__table__]
+
+
+class BulkWriter:
+    """
+    Buffers rows per table and writes them in batches
+
+    Args:
+        connection: SQLAlchemy connection to write through
+        batch_size (int): Rows buffered per table before a flush
+        use_copy (bool): Use PostgreSQL COPY when the driver supports it
+    """
+
+    def __init__(self, connection, batch_size=5000, use_copy=True):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.buffers = {table.name: [] for table in TABLES}
+        self.counts = {table.name: 0 for table in TABLES}
+        self.copy_method = self._detect_copy() if use_copy else None
+
+    def _detect_copy(self):
+        """Find a COPY implementation for the current driver, if any"""
+        if self.connection.dialect.name != 'postgresql':
+            return None
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        if hasattr(cursor, 'copy_expert'):
+            return 'psycopg2'
+        if hasattr(cursor, 'copy'):
+            return 'psycopg'
+        return None
+
+    def add(self, table, row):
+        """Buffer a row, flushing all tables when this buffer is full"""
+        buffer = self.buffers[table.name]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows in foreign key order and commit"""
+        for table in TABLES:
+            rows = self.buffers[table.name]
+            if not rows:
+                continue
+            if self.copy_method:
+                self._copy(table, rows)
+            else:
+                self.connection.execute(table.insert(), rows)
+            self.counts[table.name] += len(rows)
+            self.buffers[table.name] = []
+        self.connection.commit()
+
+    def _copy(self, table, rows):
+        """Write rows with PostgreSQL COPY ... FROM STDIN"""
+        columns = list(rows[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+
+        sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        if self.copy_method == 'psycopg2':
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def _next_ids(connection):
+    """Get the first free primary key for each table"""
+    return {
+        table.name: (connection.execute(db.select(func.max(table.c.id))).scalar() or 0) + 1
+        for table in TABLES
+    }
+
+
+def _reset_sequences(connection):
+    """Move PostgreSQL id sequences past the explicitly inserted ids"""
+    if connection.dialect.name != 'postgresql':
+        return
+    for table in TABLES:
+        connection.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+        )
+    connection.commit()
+
+
+def _plan_group(rng, weeks, max_group_size):
+    """
+    Pick a status, size and cycle position for a group
+
+    Returns:
+        tuple: (status, cycle_size, member_count, completed_cycles, current_cycle)
+    """
+    status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+    if status == 'complete' and weeks < 2:
+        status = 'collecting'
+
+    if status == 'forming':
+        cycle_size = rng.randint(2, max_group_size)
+        return status, cycle_size, rng.randint(1, cycle_size - 1), 0, 0
+
+    if status == 'complete':
+        cycle_size = rng.randint(2, min(max_group_size, weeks))
+        return status, cycle_size, cycle_size, cycle_size, cycle_size
+
+    # collecting/disbursing: cycles before current_cycle are settled
+    cycle_size = rng.randint(2, max_group_size)
+    completed = rng.randint(0, min(cycle_size, weeks) - 1)
+    return status, cycle_size, cycle_size, completed, completed + 1
+
+
+def seed_database(users=1000, groups=100, weeks=52, max_group_size=12, batch_size=5000,
+                  use_copy=True, random_seed=None, progress=None):
+    """
+    Generate a consistent synthetic dataset
+
+    Args:
+        users (int): Users to create
+        groups (int): Groups to create
+        weeks (int): Length of the contribution history window
+        max_group_size (int): Largest cycle_size generated
+        batch_size (int): Rows per batched write
+        use_copy (bool): Use COPY on PostgreSQL when available
+        random_seed: Seed for reproducible data
+        progress (callable): Called with a message after each stage
+
+    Returns:
+        dict: Rows written per table and elapsed seconds
+    """
+    rng = random.Random(random_seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.monotonic()
+    max_group_size = max(2, min(max_group_size, users))
+
+    with db.engine.connect() as connection:
+        ids = _next_ids(connection)
+        writer = BulkWriter(connection, batch_size=batch_size, use_copy=use_copy)
+
+        user_ids = range(ids['users'], ids['users'] + users)
+        for user_id in user_ids:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            joined = now - timedelta(weeks=weeks, days=rng.randint(0, 365))
+            writer.add(User.__table__, {
+                'id': user_id,
+                'supabase_id': None,
+                'username': f'seed{user_id}',
+                'full_name': f'{first} {last}',
+                'email': f'seed{user_id}@example.com',
+                'phone': f'+233{user_id:09d}',
+                'password_hash': None,
+                'created_at': joined,
+                'updated_at': joined,
+            })
+        writer.flush()
+        if progress:
+            progress(f'Inserted {users} users')
+
+        membership_id = ids['memberships']
+        invitation_id = ids['group_invitations']
+        transaction_id = ids['transactions']
+
+        for group_id in range(ids['groups'], ids['groups'] + groups):
+            status, cycle_size, member_count, completed, current_cycle = _plan_group(rng, weeks, max_group_size)
+            weekly_amount = rng.choice(WEEKLY_AMOUNTS)
+            members = rng.sample(user_ids, member_count)
+            started_at = now - timedelta(weeks=completed + 1, hours=rng.randint(0, 72))
+
+            writer.add(Group.__table__, {
+                'id': group_id,
+                'name': f'{rng.choice(LAST_NAMES)} Circle {group_id}',
+                'description': f'Synthetic {status} group',
+                'created_by': members[0],
+                'cycle_size': cycle_size,
+                'weekly_amount': weekly_amount,
+                'status': status,
+                'current_cycle': current_cycle,
+                'member_count': member_count,
+                'created_at': started_at,
+                'updated_at': now,
+            })
+
+            # Members in the current cycle who have already paid
+            if status == 'collecting':
+                paid_now = set(rng.sample(range(1, member_count + 1), rng.randint(0, member_count - 1)))
+            elif status == 'disbursing':
+                paid_now = set(range(1, member_count + 1))
+            else:
+                paid_now = set()
+
+            group_memberships = {}
+            for payout_order, user_id in enumerate(members, start=1):
+                group_memberships[payout_order] = membership_id
+                writer.add(Membership.__table__, {
+                    'id': membership_id,
+                    'user_id': user_id,
+                    'group_id': group_id,
+                    'payout_order': payout_order,
+                    'has_paid_this_cycle': payout_order in paid_now,
+                    'created_at': started_at,
+                    'updated_at': now,
+                })
+                membership_id += 1
+
+            if status == 'forming':
+                for _ in range(rng.randint(0, cycle_size - member_count)):
+                    created_at = now - timedelta(hours=rng.randint(1, 24 * 7 * 2))
+                    invitation_status = rng.choice(['pending', 'pending', 'accepted', 'cancelled'])
+                    writer.add(GroupInvitation.__table__, {
+                        'id': invitation_id,
+                        'group_id': group_id,
+                        'invited_by': members[0],
+                        'invitation_code': f'S{invitation_id:07d}',
+                        'invited_email': f'invitee{invitation_id}@example.com',
+                        'invited_phone': None,
+                        'invited_name': None,
+                        'status': invitation_status,
+                        'expires_at': created_at + timedelta(hours=48),
+                        'created_at': created_at,
+                        'accepted_at': None,
+                        'accepted_by': None,
+                    })
+                    invitation_id += 1
+                continue
+
+            # Settled cycles: everyone contributed, then the cycle's recipient was paid out
+            for cycle in range(1, current_cycle + 1):
+                cycle_start = started_at + timedelta(weeks=cycle - 1)
+                settled = cycle <= completed
+                for payout_order, member_membership_id in group_memberships.items():
+                    if not settled and payout_order not in paid_now:
+                        continue
+                    writer.add(Transaction.__table__, {
+                        'id': transaction_id,
+                        'membership_id': member_membership_id,
+                        'amount': weekly_amount,
+                        'tx_type': 'contribution',
+                        'reference': f'SEED-C-{member_membership_id}-{cycle}',
+                        'timestamp': cycle_start + timedelta(hours=rng.randint(1, 120)),
+                    })
+                    transaction_id += 1
+
+                if settled:
+                    writer.add(Transaction.__table__, {
+                        'id': transaction_id,
+                        'membership_id': group_memberships[cycle],
+                        'amount': weekly_amount * member_count,
+                        'tx_type': 'payout',
+                        'reference': f'SEED-P-{group_id}-{cycle}',
+                        'timestamp': cycle_start + timedelta(days=6),
+                    })
+                    transaction_id += 1
+
+        writer.flush()
+        _reset_sequences(connection)
+
+    if progress:
+        progress(f'Inserted {groups} groups with memberships, invitations and transactions')
+
+    return {'rows': writer.counts, 'seconds': time.monotonic() - started, 'copy': writer.copy_method}
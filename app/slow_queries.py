@@ -0,0 +1,178 @@
+"""
+Slow query log
+Times every statement on the app's engines and records the ones slower
+than SLOW_QUERY_THRESHOLD_MS with their normalized SQL, parameter
+shapes, originating route, Python call site and query plan. The last
+SLOW_QUERY_LOG_SIZE entries are kept in memory for the admin view.
+"""
+
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.query_plans import explain_with_cursor
+import logging
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIPPED_FILES = {os.path.abspath(__file__), os.path.join(_APP_DIR, 'metrics.py')}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|%s))+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+
+class SlowQueryLog:
+    """
+    Thread-safe ring buffer of slow query entries
+
+    Args:
+        maxlen (int): Number of entries kept; the oldest are dropped first
+    """
+
+    def __init__(self, maxlen=100):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def configure(self, maxlen):
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=maxlen)
+
+    def append(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """Get the entries, newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+_settings = {'threshold': None, 'explain': True}
+
+
+def normalize_sql(statement):
+    """Collapse whitespace, literals and placeholder lists so similar statements group together"""
+    sql = _STRING_LITERAL.sub('?', statement)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def parameter_shape(parameters, executemany=False):
+    """Describe bound parameters by type only, so no values are logged"""
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0]) if rows else None
+        return {'rows': len(rows), 'row': first}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def call_site():
+    """Find the innermost frame in the app's own code that led to this statement"""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_APP_DIR) and filename not in _SKIPPED_FILES:
+            return f'{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def _capture_plan(conn, statement, parameters):
+    """
+    EXPLAIN a statement on the same connection, inside a savepoint on
+    PostgreSQL so a failed EXPLAIN can't abort the caller's transaction
+    """
+    dialect = conn.dialect.name
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if dialect == 'postgresql':
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            plan = explain_with_cursor(cursor, dialect, statement, parameters)
+        except Exception as e:
+            if dialect == 'postgresql':
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return [f'EXPLAIN failed: {e}']
+        finally:
+            if dialect == 'postgresql':
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_slow_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_slow_query_started')
+    if not started:
+        return
+    elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+
+    threshold = _settings['threshold']
+    if threshold is None or elapsed_ms < threshold:
+        return
+
+    plan = None
+    if _settings['explain'] and not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+        plan = _capture_plan(conn, statement, parameters)
+
+    entry = {
+        'recorded_at': datetime.utcnow().isoformat(),
+        'duration_ms': round(elapsed_ms, 3),
+        'sql': normalize_sql(statement),
+        'parameters': parameter_shape(parameters, executemany),
+        'endpoint': request.endpoint if has_request_context() else None,
+        'path': request.path if has_request_context() else None,
+        'call_site': call_site(),
+        'plan': plan,
+    }
+    slow_query_log.append(entry)
+    logger.warning(
+        f"Slow query ({entry['duration_ms']}ms) at {entry['call_site']} "
+        f"[{entry['endpoint']}]: {entry['sql']}"
+    )
+
+
+_listeners_installed = False
+
+
+def init_slow_query_log(app):
+    """Start timing statements if SLOW_QUERY_THRESHOLD_MS is set"""
+    global _listeners_installed
+
+    threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    _settings['threshold'] = threshold if threshold and threshold > 0 else None
+    _settings['explain'] = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    slow_query_log.configure(app.config.get('SLOW_QUERY_LOG_SIZE', 100))
+
+    if _settings['threshold'] is None or _listeners_installed:
+        return
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _listeners_installed = True
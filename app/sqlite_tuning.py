@@ -0,0 +1,156 @@
+"""
+SQLite high-concurrency mode
+Opt-in profile for deployments that run on a SQLite file. Every new
+connection switches to WAL with synchronous=NORMAL, a busy timeout and
+larger mmap/page caches, so readers no longer block the writer.
+Write requests to the group routes are serialized: one writer per
+process at a time, and their transactions start with BEGIN IMMEDIATE.
+A transaction that began as a reader and then tries to write fails at
+once with "database is locked" when another process is writing, and
+the busy timeout doesn't apply to that case. Taking the write lock up
+front means the transaction waits instead.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import abort, request
+from sqlalchemy import event
+from app.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+_write_lock = threading.Lock()
+_local = threading.local()
+_settings = {'enabled': False, 'busy_timeout_ms': 5000}
+
+
+def sqlite_pragmas(config):
+    """
+    Get the PRAGMAs applied to each new connection
+
+    Returns:
+        list: (name, value) tuples in the order they are applied
+    """
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 268435456)),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE', -64000)),
+        ('temp_store', config.get('SQLITE_TEMP_STORE', 'MEMORY')),
+    ]
+
+
+def tune_engine(engine, pragmas):
+    """
+    Apply pragmas on connect and let write transactions BEGIN IMMEDIATE
+
+    pysqlite's own transaction handling is turned off so SQLAlchemy
+    emits BEGIN itself, as in the SQLAlchemy pysqlite docs.
+    """
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def on_begin(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE' if getattr(_local, 'writing', False) else 'BEGIN')
+
+
+@contextmanager
+def serialized_write(timeout=None, force=False):
+    """
+    Hold this process's SQLite write lock, and start transactions opened
+    inside the block with BEGIN IMMEDIATE
+
+    Does nothing unless SQLite high-concurrency mode is on, so other
+    databases never serialize writes through the process-wide lock.
+
+    Args:
+        force (bool): Serialize even when the mode is off, for engines
+            tuned with tune_engine directly (the SQLite benchmark)
+
+    Yields:
+        bool: False if the lock wasn't free within timeout seconds, in
+            which case nothing is held
+    """
+    if not (_settings['enabled'] or force):
+        yield True
+        return
+    if not _write_lock.acquire(timeout=-1 if timeout is None else timeout):
+        yield False
+        return
+    _local.writing = True
+    try:
+        yield True
+    finally:
+        _local.writing = False
+        _write_lock.release()
+
+
+def serialize_writes(view=None, methods=None):
+    """
+    Serialize requests to a view that writes when SQLite high-concurrency mode is on
+
+    Used bare it applies to every method, since some views (join_group)
+    write on GET. Views that only write on some methods pass them, e.g.
+    @serialize_writes(methods=('POST',)), so their form renders don't
+    wait for the lock. A read transaction left open by the login check
+    is ended first, so the view's writes start a fresh BEGIN IMMEDIATE
+    transaction.
+    """
+    if view is None:
+        return lambda view: serialize_writes(view, methods=methods)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _settings['enabled'] or (methods is not None and request.method not in methods):
+            return view(*args, **kwargs)
+
+        started = time.perf_counter()
+        with serialized_write(timeout=_settings['busy_timeout_ms'] / 1000) as acquired:
+            if not acquired:
+                logger.error(f"Timed out waiting for the SQLite write lock on {request.endpoint}")
+                abort(503)
+
+            waited = time.perf_counter() - started
+            if waited > 0.5:
+                logger.warning(f"Waited {waited:.2f}s for the SQLite write lock on {request.endpoint}")
+
+            session = db.session()
+            if session.in_transaction():
+                session.commit()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                # End the view's transaction so SQLite's lock is released with ours
+                if session.in_transaction():
+                    session.rollback()
+    return wrapper
+
+
+def init_sqlite_tuning(app):
+    """Tune the app's SQLite engines when SQLITE_HIGH_CONCURRENCY is on"""
+    _settings['enabled'] = False
+    if not app.config.get('SQLITE_HIGH_CONCURRENCY'):
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+        for engine in engines:
+            tune_engine(engine, pragmas)
+
+    if engines:
+        _settings['enabled'] = True
+        _settings['busy_timeout_ms'] = app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)
+        logger.info(f"SQLite high-concurrency mode on for {len(engines)} engine(s)")
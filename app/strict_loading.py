@@ -0,0 +1,35 @@
+"""
+Strict loading mode
+When SQLALCHEMY_STRICT_LOADING is enabled, ORM queries raise instead of
+lazy loading relationships that would emit SQL, so N+1 query patterns
+fail loudly in tests instead of silently slowing pages down.
+"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import raiseload
+from app.extensions import db
+
+_listener_installed = False
+
+
+def init_strict_loading(app):
+    """Install the strict loading hook if the app config enables it"""
+    global _listener_installed
+
+    if not app.config.get('SQLALCHEMY_STRICT_LOADING') or _listener_installed:
+        return
+
+    event.listen(db.session, 'do_orm_execute', _apply_raiseload)
+    _listener_installed = True
+
+
+def _apply_raiseload(orm_execute_state):
+    """Add a wildcard raiseload to every ORM SELECT"""
+    if not has_app_context() or not current_app.config.get('SQLALCHEMY_STRICT_LOADING'):
+        return
+
+    if orm_execute_state.is_select and not orm_execute_state.is_column_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            raiseload('*', sql_only=True)
+        )
@@ -1,40 +1,171 @@
 import os
-from supabase import create_client, Client
+import re
+import threading
+import httpx
+from gotrue.http_clients import SyncClient
+from supabase import Client
+from supabase.lib.auth_client import SupabaseAuthClient
+from supabase.lib.client_options import ClientOptions
 from flask import current_app
+from app.metrics import track_upstream, upstream_errors
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Path segments that are ids, kept out of metric labels
+_ID_SEGMENT = re.compile(r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)$', re.I)
+
+# Per-process registry of Supabase clients keyed by (url, key)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class _ServerAuthClient(SupabaseAuthClient):
+    """
+    Auth client safe to share between requests.
+    Sessions are returned to the caller but never stored on the instance,
+    so one user's session can't leak into another request.
+    """
+
+    def _save_session(self, session):
+        pass
+
+
+class PooledSupabaseClient(Client):
+    """Supabase client whose auth calls go through a shared keep-alive HTTP pool"""
+
+    def __init__(self, supabase_url, supabase_key, options, http_client):
+        self._http_client = http_client
+        super().__init__(supabase_url, supabase_key, options)
+
+    def _init_supabase_auth_client(self, auth_url, client_options):
+        return _ServerAuthClient(
+            url=auth_url,
+            headers=client_options.headers,
+            auto_refresh_token=False,
+            persist_session=False,
+            storage=client_options.storage,
+            http_client=self._http_client,
+        )
+
+
+class _TimedTransport(httpx.HTTPTransport):
+    """Transport that records each Supabase call in the upstream metrics"""
+
+    def handle_request(self, request):
+        # /auth/v1/admin/users/<uuid> -> auth.admin.users.id
+        operation = '.'.join(
+            'id' if _ID_SEGMENT.match(part) else part
+            for part in request.url.path.split('/') if part and part != 'v1'
+        )
+        operation = f'{request.method} {operation}'
+        with track_upstream('supabase', operation):
+            response = super().handle_request(request)
+        if response.status_code >= 500:
+            upstream_errors.inc(service='supabase', operation=operation)
+        return response
+
+
+def _build_http_client(config):
+    """Create a pooled HTTP client from the app config"""
+    return SyncClient(
+        timeout=httpx.Timeout(
+            config.get('SUPABASE_HTTP_TIMEOUT', 10.0),
+            connect=config.get('SUPABASE_CONNECT_TIMEOUT', 5.0)
+        ),
+        transport=_TimedTransport(
+            limits=httpx.Limits(
+                max_connections=config.get('SUPABASE_POOL_MAX_CONNECTIONS', 20),
+                max_keepalive_connections=config.get('SUPABASE_POOL_MAX_KEEPALIVE', 10),
+                keepalive_expiry=config.get('SUPABASE_POOL_KEEPALIVE_EXPIRY', 30.0)
+            )
+        ),
+    )
+
+
+def _get_client(url, key):
+    """Get the process-wide client for url/key, creating it on first use"""
+    cache_key = (url, key)
+    client = _clients.get(cache_key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            config = current_app.config
+            options = ClientOptions(
+                auto_refresh_token=False,
+                persist_session=False,
+                postgrest_client_timeout=config.get('SUPABASE_HTTP_TIMEOUT', 10.0),
+                storage_client_timeout=config.get('SUPABASE_HTTP_TIMEOUT', 10.0),
+            )
+            client = PooledSupabaseClient(url, key, options, _build_http_client(config))
+            _clients[cache_key] = client
+            logger.info(f"Created pooled Supabase client for {url}")
+    return client
+
+
+def reset_supabase_clients(close=True):
+    """
+    Drop all cached clients.
+
+    Args:
+        close (bool): Close pooled connections. Pass False in a forked child,
+            where the sockets still belong to the parent process.
+    """
+    global _clients_lock
+
+    if not close:
+        # The lock may have been held by another thread at fork time
+        _clients_lock = threading.Lock()
+        _clients.clear()
+        return
+
+    with _clients_lock:
+        for client in _clients.values():
+            try:
+                client._http_client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close Supabase HTTP client: {e}")
+        _clients.clear()
+
+
+# Pre-fork servers (gunicorn, uwsgi) must not share pooled sockets with the parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: reset_supabase_clients(close=False))
+
+
 def get_supabase_client() -> Client:
     """
-    Get or create a Supabase client instance.
+    Get the shared Supabase client instance.
     Uses service role key for server-side operations.
     """
     try:
         url = current_app.config.get('SUPABASE_URL')
         service_role_key = current_app.config.get('SUPABASE_SERVICE_ROLE_KEY')
-        
+
         if not url or not service_role_key:
             raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
-        
-        return create_client(url, service_role_key)
+
+        return _get_client(url, service_role_key)
     except Exception as e:
         logger.error(f"Failed to create Supabase client: {e}")
         raise
 
 def get_supabase_anon_client() -> Client:
     """
-    Get or create a Supabase client instance using anonymous key.
+    Get the shared Supabase client instance using anonymous key.
     Use this for client-side operations or when service role is not needed.
     """
     try:
         url = current_app.config.get('SUPABASE_URL')
         anon_key = current_app.config.get('SUPABASE_ANON_KEY')
-        
+
         if not url or not anon_key:
             raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
-        
-        return create_client(url, anon_key)
+
+        return _get_client(url, anon_key)
     except Exception as e:
         logger.error(f"Failed to create Supabase anon client: {e}")
-        raise 
\ No newline at end of file
+        raise
@@ -0,0 +1,32 @@
+"""Add denormalized member_count to groups
+
+Revision ID: 4b7d2e91c3a5
+Revises: 2308f6de6f1d
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7d2e91c3a5'
+down_revision = '2308f6de6f1d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill the counter from the existing memberships
+    op.execute(
+        'UPDATE groups SET member_count = '
+        '(SELECT COUNT(*) FROM memberships WHERE memberships.group_id = groups.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_column('member_count')
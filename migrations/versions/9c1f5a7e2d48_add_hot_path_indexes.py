@@ -0,0 +1,42 @@
+"""Add indexes for hot lookup paths
+
+Revision ID: 9c1f5a7e2d48
+Revises: 4b7d2e91c3a5
+Create Date: 2026-10-17 10:03:17.542981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1f5a7e2d48'
+down_revision = '4b7d2e91c3a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('memberships', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_memberships_user_id_group_id', ['user_id', 'group_id'])
+        batch_op.create_index('ix_memberships_group_id_payout_order', ['group_id', 'payout_order'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_membership_id_tx_type_timestamp', ['membership_id', 'tx_type', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('group_invitations', schema=None) as batch_op:
+        batch_op.create_index('ix_group_invitations_group_id_created_at', ['group_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_group_invitations_status_expires_at', ['status', 'expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('group_invitations', schema=None) as batch_op:
+        batch_op.drop_index('ix_group_invitations_status_expires_at')
+        batch_op.drop_index('ix_group_invitations_group_id_created_at')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_membership_id_tx_type_timestamp')
+
+    with op.batch_alter_table('memberships', schema=None) as batch_op:
+        batch_op.drop_index('ix_memberships_group_id_payout_order')
+        batch_op.drop_constraint('uq_memberships_user_id_group_id', type_='unique')
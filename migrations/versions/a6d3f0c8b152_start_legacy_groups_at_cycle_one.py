@@ -0,0 +1,31 @@
+"""Start legacy collecting groups at cycle 1
+
+Revision ID: a6d3f0c8b152
+Revises: f3b8d5a1c6e9
+Create Date: 2026-10-17 18:05:27.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3f0c8b152'
+down_revision = 'f3b8d5a1c6e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Groups started before reserve_slot set current_cycle kept the default
+    # of 0, which matches no payout_order, so settlement never found them
+    op.execute(
+        "UPDATE groups SET current_cycle = 1 "
+        "WHERE status IN ('collecting', 'disbursing') "
+        "AND (current_cycle IS NULL OR current_cycle < 1)"
+    )
+
+
+def downgrade():
+    # The legacy value only meant "cycle 1 not recorded"; nothing to restore
+    pass
@@ -0,0 +1,33 @@
+"""Close gaps in memberships.payout_order
+
+Revision ID: b8e2c4f7a913
+Revises: a6d3f0c8b152
+Create Date: 2026-10-17 18:22:51.067342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2c4f7a913'
+down_revision = 'a6d3f0c8b152'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Members who left before release_slot existed left gaps, so a group's
+    # orders could be {1, 3} with a member_count of 2 and reserve_slot would
+    # hand out 3 again. Renumber each group to 1..n, keeping the rotation order
+    op.execute(
+        'UPDATE memberships SET payout_order = ranked.position '
+        'FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY payout_order, id) AS position '
+        'FROM memberships) AS ranked '
+        'WHERE ranked.id = memberships.id AND memberships.payout_order <> ranked.position'
+    )
+
+
+def downgrade():
+    # The old gaps carried no meaning; nothing to restore
+    pass
@@ -0,0 +1,41 @@
+"""Add auth_identities mirror of Supabase users
+
+Revision ID: c3e8a1f4b276
+Revises: 9c1f5a7e2d48
+Create Date: 2026-10-17 11:26:05.331874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a1f4b276'
+down_revision = '9c1f5a7e2d48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('auth_identities',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('supabase_id', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('full_name', sa.String(length=100), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('supabase_id')
+    )
+    with op.batch_alter_table('auth_identities', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_auth_identities_email'), ['email'], unique=False)
+        batch_op.create_index(batch_op.f('ix_auth_identities_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('auth_identities', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_auth_identities_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_auth_identities_email'))
+
+    op.drop_table('auth_identities')
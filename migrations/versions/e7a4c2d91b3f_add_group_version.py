@@ -0,0 +1,26 @@
+"""Add version to groups for compare-and-swap state transitions
+
+Revision ID: e7a4c2d91b3f
+Revises: c3e8a1f4b276
+Create Date: 2026-10-17 14:02:18.540127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a4c2d91b3f'
+down_revision = 'c3e8a1f4b276'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_column('version')
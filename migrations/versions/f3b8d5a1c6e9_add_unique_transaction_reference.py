@@ -0,0 +1,26 @@
+"""Add unique index on transactions.reference for idempotent contributions
+
+Revision ID: f3b8d5a1c6e9
+Revises: e7a4c2d91b3f
+Create Date: 2026-10-17 16:41:09.213874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d5a1c6e9'
+down_revision = 'e7a4c2d91b3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_reference', ['reference'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_reference')
@@ -0,0 +1,33 @@
+"""
+Test fixtures
+Tests run against TEST_DATABASE_URL when it is set (for PostgreSQL),
+otherwise against a scratch SQLite file, never the configured database.
+"""
+
+import os
+import pytest
+from app import create_app
+from app.extensions import db
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Testing app with the schema created on the test database"""
+    database_url = os.environ.get('TEST_DATABASE_URL') or \
+        f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    app = create_app('testing', config_overrides={'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+        db.session.remove()
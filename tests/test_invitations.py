@@ -0,0 +1,70 @@
+import io
+import secrets
+from decimal import Decimal
+import pytest
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models import Group, GroupInvitation, User
+
+
+@pytest.fixture
+def creator_client(app, app_context):
+    """A logged-in client for the creator of a forming group; returns (client, group_id)"""
+    token = secrets.token_hex(4)
+    user = User(
+        username=f'inviter-{token}',
+        full_name='Inviter',
+        email=f'inviter-{token}@example.com',
+        phone=f'+7{token[:6]}',
+    )
+    db.session.add(user)
+    db.session.flush()
+    group = Group(name=f'Invites {token}', created_by=user.id, cycle_size=5,
+                  weekly_amount=Decimal('10.00'), status='forming', member_count=0)
+    db.session.add(group)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client, group.id
+
+
+def invitation_count(group_id):
+    return db.session.execute(
+        select(func.count(GroupInvitation.id)).where(GroupInvitation.group_id == group_id)
+    ).scalar()
+
+
+def test_invite_with_too_long_email_flashes_the_error(creator_client):
+    client, group_id = creator_client
+    response = client.post(f'/groups/invite/{group_id}', data={'invited_email': 'x' * 200 + '@example.com'},
+                           follow_redirects=True)
+
+    assert response.status_code == 200
+    assert b'email too long' in response.data
+    assert b'index out of range' not in response.data
+    assert invitation_count(group_id) == 0
+
+
+def test_bulk_invite_rejects_non_utf8_csv(creator_client):
+    client, group_id = creator_client
+    csv_bytes = 'name,email\nJosé,jose@example.com\n'.encode('latin-1')
+    response = client.post(f'/groups/invite/{group_id}/bulk',
+                           data={'contacts_file': (io.BytesIO(csv_bytes), 'contacts.csv')},
+                           content_type='multipart/form-data', follow_redirects=True)
+
+    assert response.status_code == 200
+    assert b'UTF-8' in response.data
+    assert invitation_count(group_id) == 0
+
+
+def test_bulk_invite_reports_bad_rows(creator_client):
+    client, group_id = creator_client
+    response = client.post(f'/groups/invite/{group_id}/bulk', json={
+        'contacts': [{'email': 'ama@example.com'}, 'not a contact', {'name': 'No Contact'}]
+    })
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['created'] == 1
+    assert len(body['errors']) == 2
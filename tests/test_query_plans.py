@@ -0,0 +1,16 @@
+import pytest
+from app.extensions import db
+from app.query_plans import check_hot_queries, hot_queries
+
+
+@pytest.fixture(scope='module')
+def plans(app):
+    """EXPLAIN of every hot query on the test database's dialect"""
+    with app.app_context():
+        return check_hot_queries(db.engine)
+
+
+@pytest.mark.parametrize('name', sorted(hot_queries()))
+def test_hot_query_uses_an_index(plans, name):
+    plan, uses_index = plans[name]
+    assert uses_index, f'{name} scans a full table: {plan}'
@@ -0,0 +1,105 @@
+import secrets
+import threading
+from decimal import Decimal
+import pytest
+from sqlalchemy import insert, select
+from app.extensions import db
+from app.models import Group, Membership, User
+from app.groups.slots import AlreadyMember, SlotUnavailable, release_slot, reserve_slot
+
+
+def create_forming_group(users, slots):
+    """Create users and a forming group; returns (group_id, user_ids)"""
+    token = secrets.token_hex(4)
+    db.session.execute(insert(User), [
+        {
+            'username': f'slots-{token}-{i}',
+            'full_name': f'Slots User {i}',
+            'email': f'slots-{token}-{i}@example.com',
+            'phone': f'+9{token[:6]}{i:05d}',
+        }
+        for i in range(users)
+    ])
+    user_ids = db.session.execute(
+        select(User.id).where(User.username.like(f'slots-{token}-%')).order_by(User.id)
+    ).scalars().all()
+    group = Group(
+        name=f'Slots {token}',
+        created_by=user_ids[0],
+        cycle_size=slots,
+        weekly_amount=Decimal('1.00'),
+        status='forming',
+        member_count=0,
+    )
+    db.session.add(group)
+    db.session.commit()
+    return group.id, user_ids
+
+
+def payout_orders(group_id):
+    return db.session.execute(
+        select(Membership.payout_order).where(Membership.group_id == group_id).order_by(Membership.payout_order)
+    ).scalars().all()
+
+
+def test_concurrent_joins_get_distinct_slots(app, app_context):
+    joins, slots = 100, 75
+    group_id, user_ids = create_forming_group(joins, slots)
+
+    barrier = threading.Barrier(joins)
+    lock = threading.Lock()
+    outcomes = {'joined': 0, 'started': 0, 'full': 0}
+
+    def join(user_id):
+        barrier.wait()
+        with app.app_context():
+            try:
+                _, started = reserve_slot(group_id, user_id)
+                db.session.commit()
+                outcome = 'started' if started else 'joined'
+            except SlotUnavailable:
+                db.session.rollback()
+                outcome = 'full'
+        with lock:
+            outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=join, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.rollback()
+    group = db.session.get(Group, group_id)
+    assert payout_orders(group_id) == list(range(1, slots + 1))
+    assert group.member_count == slots
+    assert outcomes == {'joined': slots - 1, 'started': 1, 'full': joins - slots}
+    assert group.status == 'collecting'
+    assert group.current_cycle == 1
+
+
+def test_rejoin_is_refused(app_context):
+    group_id, (user_id, _) = create_forming_group(2, 3)
+    reserve_slot(group_id, user_id)
+    db.session.commit()
+
+    with pytest.raises(AlreadyMember):
+        reserve_slot(group_id, user_id)
+    assert db.session.get(Group, group_id).member_count == 1
+
+
+def test_release_slot_closes_the_gap(app_context):
+    group_id, user_ids = create_forming_group(3, 4)
+    for user_id in user_ids:
+        reserve_slot(group_id, user_id)
+    db.session.commit()
+
+    leaver = db.session.execute(
+        select(Membership).where(Membership.group_id == group_id, Membership.payout_order == 1)
+    ).scalar_one()
+    release_slot(leaver)
+    db.session.commit()
+
+    assert payout_orders(group_id) == [1, 2]
+    assert reserve_slot(group_id, user_ids[0]) == (3, False)
+    db.session.commit()
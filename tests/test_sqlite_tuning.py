@@ -0,0 +1,19 @@
+from app import sqlite_tuning
+from app.sqlite_tuning import serialized_write
+
+
+def test_serialized_write_is_a_no_op_when_the_mode_is_off(app):
+    assert not sqlite_tuning._settings['enabled']
+    with serialized_write(timeout=0) as acquired:
+        assert acquired
+        assert not sqlite_tuning._write_lock.locked()
+        assert not getattr(sqlite_tuning._local, 'writing', False)
+
+
+def test_forced_serialized_write_holds_the_lock(app):
+    with serialized_write(timeout=0, force=True) as acquired:
+        assert acquired
+        assert sqlite_tuning._write_lock.locked()
+        with serialized_write(timeout=0, force=True) as nested:
+            assert not nested
+    assert not sqlite_tuning._write_lock.locked()
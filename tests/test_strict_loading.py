@@ -0,0 +1,63 @@
+import secrets
+from decimal import Decimal
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from app.extensions import db
+from app.models import Group, Membership, User
+
+
+@pytest.fixture
+def group_with_members(app_context):
+    """A forming group with three members; returns (group_id, first member's user id)"""
+    token = secrets.token_hex(4)
+    users = [
+        User(
+            username=f'strict-{token}-{i}',
+            full_name=f'Strict User {i}',
+            email=f'strict-{token}-{i}@example.com',
+            phone=f'+8{token[:6]}{i:05d}',
+        )
+        for i in range(3)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+    group = Group(
+        name=f'Strict {token}',
+        created_by=users[0].id,
+        cycle_size=5,
+        weekly_amount=Decimal('10.00'),
+        status='forming',
+        member_count=len(users),
+    )
+    db.session.add(group)
+    db.session.flush()
+    db.session.add_all([
+        Membership(user_id=user.id, group_id=group.id, payout_order=order)
+        for order, user in enumerate(users, start=1)
+    ])
+    db.session.commit()
+    group_id, user_id = group.id, users[0].id
+    db.session.remove()
+    return group_id, user_id
+
+
+def test_lazy_load_raises(group_with_members):
+    group_id, _ = group_with_members
+    membership = db.session.execute(
+        select(Membership).where(Membership.group_id == group_id)
+    ).scalars().first()
+
+    with pytest.raises(InvalidRequestError):
+        membership.user
+
+
+def test_view_group_renders_without_lazy_loads(app, group_with_members):
+    group_id, user_id = group_with_members
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    response = client.get(f'/groups/view/{group_id}')
+    assert response.status_code == 200
+    assert b'Strict User 2' in response.data
@@ -0,0 +1,49 @@
+import secrets
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import User
+from app.auth import tokens
+
+
+@pytest.fixture
+def identity(monkeypatch):
+    """A Supabase identity with no local profile, returned for any token"""
+    token = secrets.token_hex(4)
+    identity = SimpleNamespace(
+        id=f'supabase-{token}',
+        email=f'ama{token}@example.com',
+        phone=f'+6{token[:6]}',
+        user_metadata={'full_name': 'Ama Mensah'},
+    )
+    monkeypatch.setattr(tokens, 'get_token_identity', lambda token: (identity, None))
+    return identity
+
+
+def test_unknown_identity_gets_a_profile_with_a_username(app_context, identity):
+    user = tokens.authenticate_token(f'token-{identity.id}')
+
+    assert user.supabase_id == identity.id
+    assert user.username == identity.email.split('@')[0]
+    assert tokens.authenticate_token(f'token-{identity.id}').id == user.id
+
+
+def test_taken_username_gets_a_suffix(app_context, identity):
+    base = identity.email.split('@')[0]
+    db.session.add(User(username=base, full_name='Other', email=f'other-{base}@example.com', phone=f'+5{base[-6:]}'))
+    db.session.commit()
+
+    user = tokens.authenticate_token(f'token-{identity.id}')
+    assert user.username == f'{base}1'
+
+
+def test_failed_profile_insert_leaves_a_usable_session(app_context, identity):
+    # The phone number is already taken, so the insert fails for a reason other than the username
+    db.session.add(User(username=f'phone-{identity.id}', full_name='Other',
+                        email=f'phone-{identity.email}', phone=identity.phone))
+    db.session.commit()
+
+    with pytest.raises(IntegrityError):
+        tokens.authenticate_token(f'token-{identity.id}')
+    assert User.find_by_supabase_id(identity.id) is None